@@ -0,0 +1 @@
+from main.asgi import app  # noqa
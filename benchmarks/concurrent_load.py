@@ -0,0 +1,115 @@
+"""
+Throughput and latency of a running server for rising numbers of concurrent connections
+
+Compare the WSGI and ASGI deployments with the same worker count, e.g.
+
+    gunicorn --workers 1 --threads 10 --bind :8000 wsgi:app
+    uvicorn --workers 1 --port 8001 asgi:app
+
+    python -m benchmarks.concurrent_load http://127.0.0.1:8000/categories/1/items
+    python -m benchmarks.concurrent_load http://127.0.0.1:8001/categories/1/items
+
+Each connection sends keep-alive GET requests back to back for --duration
+seconds. Lists may be served from the response cache, /categories/<id> and
+/categories/<id>/items/<id> always read the db or the lookup cache.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def request(reader, writer, host, target):
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+
+    version, status, *_ = (await reader.readline()).split()
+    # HTTP/1.0 servers, such as the flask development server, close the
+    # connection after every response
+    keep_alive = version == b"HTTP/1.1"
+    content_length = 0
+    chunked = False
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.lower() == "content-length":
+            content_length = int(value)
+        elif name.lower() == "transfer-encoding" and "chunked" in value:
+            chunked = True
+        elif name.lower() == "connection" and "close" in value.lower():
+            keep_alive = False
+
+    if not chunked:
+        await reader.readexactly(content_length)
+        return int(status), keep_alive
+
+    while True:
+        size = int((await reader.readline()).strip(), 16)
+        await reader.readexactly(size + 2)
+        if size == 0:
+            return int(status), keep_alive
+
+
+async def connection(url, deadline, latencies, errors):
+    parts = urlsplit(url)
+    target = parts.path + (f"?{parts.query}" if parts.query else "")
+    writer = None
+    while time.monotonic() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(
+                    parts.hostname, parts.port
+                )
+            start = time.perf_counter()
+            status, keep_alive = await request(reader, writer, parts.netloc, target)
+            latencies.append(time.perf_counter() - start)
+            if status >= 500:
+                errors.append(status)
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            errors.append("connection")
+            keep_alive = False
+
+        if not keep_alive and writer is not None:
+            writer.close()
+            writer = None
+
+    if writer is not None:
+        writer.close()
+
+
+async def measure(url, concurrency, duration):
+    latencies = []
+    errors = []
+    deadline = time.monotonic() + duration
+    await asyncio.gather(
+        *(connection(url, deadline, latencies, errors) for _ in range(concurrency))
+    )
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("url")
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 10, 100, 500]
+    )
+    parser.add_argument("--duration", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"{'connections':>12}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for concurrency in args.concurrency:
+        latencies, errors = asyncio.run(measure(args.url, concurrency, args.duration))
+        if len(latencies) > 1:
+            quantiles = statistics.quantiles(latencies, n=100)
+            p50, p99 = quantiles[49] * 1000, quantiles[98] * 1000
+        else:
+            p50 = p99 = float("nan")
+        rate = len(latencies) / args.duration
+        print(f"{concurrency:>12}{rate:>10.0f}{p50:>10.1f}{p99:>10.1f}{len(errors):>8}")
+
+
+if __name__ == "__main__":
+    main()
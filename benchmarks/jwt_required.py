@@ -0,0 +1,47 @@
+"""
+Overhead of the jwt_required decorator with and without the verified-token cache
+
+    python -m benchmarks.jwt_required [--calls 20000]
+"""
+import argparse
+import time
+
+from main import app
+from main.commons.decorators import jwt_required
+from main.libs.utils import generate_jwt_token, verified_jwt_cache
+
+
+@jwt_required
+def view(user_id):
+    return user_id
+
+
+def measure(calls, cached):
+    headers = {"Authorization": f"Bearer {generate_jwt_token(user_id=1)}"}
+    with app.test_request_context(headers=headers):
+        verified_jwt_cache.clear()
+        start = time.perf_counter()
+        for _ in range(calls):
+            if not cached:
+                verified_jwt_cache.clear()
+            view()
+        elapsed = time.perf_counter() - start
+
+    return elapsed / calls * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    uncached = measure(args.calls, cached=False)
+    cached = measure(args.calls, cached=True)
+    print(f"{'jwt_required':<24}{'us/call':>10}")
+    print(f"{'verify every call':<24}{uncached:>10.2f}")
+    print(f"{'verified-token cache':<24}{cached:>10.2f}")
+    print(f"speedup: {uncached / cached:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Request time spent logging, for a request failing validation and logging a warning
+
+    python -m benchmarks.logging_overhead [--requests 5000] [--write-delay 0.0005]
+
+stdout is replaced by a stream sleeping --write-delay seconds per write, as a
+backpressured pipe to a log collector would.
+"""
+import argparse
+import logging
+import time
+
+from main import app
+from main.libs import log
+from main.libs.log import JsonFormatter, RateLimitFilter, ServiceLogger
+
+LOGGER_NAME = "main.commons.error_handlers"
+
+
+class SlowStream:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def write(self, _):
+        time.sleep(self.delay)
+
+    def flush(self):
+        pass
+
+
+def configure(logger, mode, stream):
+    """
+    :param mode: "sync" writes from the request thread, as before the logging
+        queue. "queue" hands records to the logging thread, "rate limited" also
+        keeps the filter. "disabled" raises the level above WARNING
+    """
+    logger.handlers.clear()
+    logger.filters.clear()
+    logger.setLevel(logging.INFO)
+
+    if mode == "sync":
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(JsonFormatter())
+        logger.addHandler(handler)
+        return
+
+    log.stream_handler.setStream(stream)
+    logger.addHandler(log.queue_handler)
+    if mode == "rate limited":
+        logger.addFilter(RateLimitFilter(limit=10, period=60))
+    if mode == "disabled":
+        logger.setLevel(logging.ERROR)
+
+
+def measure(client, requests):
+    start = time.perf_counter()
+    for _ in range(requests):
+        client.post("/users/auth", json={})
+    elapsed = time.perf_counter() - start
+
+    return elapsed / requests * 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--write-delay", type=float, default=0.0005)
+    args = parser.parse_args()
+
+    logger = ServiceLogger(LOGGER_NAME).logger
+    stream = SlowStream(args.write_delay)
+    client = app.test_client()
+
+    print(f"{'logging':<16}{'us/request':>12}")
+    for mode in ("sync", "queue", "rate limited", "disabled"):
+        configure(logger, mode, stream)
+        elapsed = measure(client, args.requests)
+        print(f"{mode:<16}{elapsed:>12.1f}")
+
+        # Don't let the records still queued slow down the next mode
+        while not log.queue_handler.queue.empty():
+            time.sleep(0.01)
+
+
+if __name__ == "__main__":
+    main()
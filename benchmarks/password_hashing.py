@@ -0,0 +1,63 @@
+"""
+Login throughput of each password hashing cost, to size /users/auth workers
+
+    python -m benchmarks.password_hashing [--threads 4] [--seconds 3]
+
+A login costs one hash (two while an old hash is upgraded), so hashes/sec
+is the ceiling on logins/sec for the given number of hashing threads.
+"""
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from main.libs.utils import Pbkdf2Hasher, ScryptHasher, generate_random_salt
+
+HASHERS = [
+    ScryptHasher(n=2**13, r=8, p=1),
+    ScryptHasher(n=2**14, r=8, p=1),
+    ScryptHasher(n=2**15, r=8, p=1),
+    Pbkdf2Hasher(iterations=100_000),
+    Pbkdf2Hasher(iterations=260_000),
+    Pbkdf2Hasher(iterations=600_000),
+]
+
+
+def measure(hasher, threads, seconds):
+    salt = generate_random_salt()
+    deadline = time.perf_counter() + seconds
+
+    def hash_until_deadline():
+        count = 0
+        while time.perf_counter() < deadline:
+            hasher.hash("Abc123", salt)
+            count += 1
+        return count
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(hash_until_deadline) for _ in range(threads)]
+        count = sum(future.result() for future in futures)
+    elapsed = time.perf_counter() - start
+
+    return count / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    print(f"{'hasher':<32}{'ms/hash':>10}{'logins/s (1)':>16}", end="")
+    print(f"{f'logins/s ({args.threads})':>16}")
+    for hasher in HASHERS:
+        single = measure(hasher, 1, args.seconds)
+        threaded = measure(hasher, args.threads, args.seconds)
+        print(
+            f"{hasher.prefix.rstrip('$'):<32}{1000 / single:>10.1f}"
+            f"{single:>16.1f}{threaded:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,448 @@
+"""
+Latency and requests/sec of every route, with baselines to catch regressions
+
+    ENVIRONMENT=test python -m benchmarks.routes seed [--users 100] ... [--yes]
+    ENVIRONMENT=test python -m benchmarks.routes run [--requests 200] [--save FILE]
+    python -m benchmarks.routes compare BASELINE RESULTS [--threshold 0.25]
+        [--p99-threshold 1]
+
+`seed` drops every table of the configured database, SQLite or MySQL, and fills
+it with tests.helper.setup_db at the given sizes. It refuses to unless
+ENVIRONMENT is test or --yes is passed. `run` sends each route
+--requests requests in turn through the app's test client. That covers the
+decorators, schemas and db but not a WSGI server; see benchmarks.concurrent_load
+for that. Writes go to a category `run` creates, so reads keep seeing the seeded
+rows. Routes reading through the caches are measured twice: warm, and "(cold)"
+with every cache cleared before each request. `compare` exits with 1 when a
+route's p50 latency is more than --threshold slower than in BASELINE, a file
+saved by `run --save`, or its p99 more than --p99-threshold slower, when it has
+more errors, or when a route of BASELINE is missing from RESULTS.
+"""
+import argparse
+import json
+import statistics
+import sys
+import time
+from collections import namedtuple
+from pathlib import Path
+from uuid import uuid4
+
+from alembic.command import upgrade
+from alembic.config import Config
+
+from main import app, config, db
+from main.engines.cache import clear_caches
+from main.libs.utils import generate_jwt_token
+from main.models.category import CategoryModel
+from main.models.item import ItemModel
+from main.models.user import UserModel
+from tests.helper import USER_CREDENTIALS, setup_db
+
+ALEMBIC_CONFIG = (
+    (Path(__file__) / ".." / ".." / "migrations" / "alembic.ini").resolve().as_posix()
+)
+
+# `request(i)` returns the client.open kwargs of the i-th request, `cached`
+# routes read through the lookup or response caches
+Route = namedtuple(
+    "Route", "method rule request expected_status cached", defaults=[False]
+)
+
+
+def seed(args):
+    if config.ENV != "test" and not args.yes:
+        sys.exit(
+            f"Not dropping the tables of {db.engine.url!r}, the {config.ENV} "
+            f"database. Run with ENVIRONMENT=test, or pass --yes."
+        )
+
+    print(f"Seeding {db.engine.url!r}")
+    db.reflect()
+    db.drop_all()
+    upgrade(Config(ALEMBIC_CONFIG), "heads")
+    db.create_all()
+
+    start = time.perf_counter()
+    setup_db(
+        users=args.users,
+        categories_per_user=args.categories_per_user,
+        item_categories=args.item_categories,
+        items_per_category=args.items_per_category,
+    )
+    print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+
+def make_routes(run_id, requests):
+    """
+    Return a Route for every route of the app, reading the seeded rows and
+    writing rows named after `run_id`, mostly to a new category of user 1
+    """
+    auth = {"Authorization": f"Bearer {generate_jwt_token(user_id=1)}"}
+    email, password = USER_CREDENTIALS[0]
+
+    scratch = CategoryModel(name=f"bench_{run_id}", user_id=1)
+    db.session.add(scratch)
+    db.session.commit()
+    # Rows deleted, and items renamed, one per request
+    deleted_category_ids = _insert_categories(run_id, requests)
+    item_ids = _insert_items(scratch.id, f"bench_{run_id}", requests)
+    deleted_item_ids = _insert_items(scratch.id, f"bench_deleted_{run_id}", requests)
+
+    def item(i, prefix="post"):
+        # Not matched by the search below, which should only find seeded items
+        return {"name": f"bench_{prefix}_{run_id}_{i}", "description": "written"}
+
+    def import_body(i):
+        lines = (json.dumps(item(f"{i}_{j}", "import")) for j in range(10))
+        return "\n".join(lines).encode()
+
+    scratch_items = f"/categories/{scratch.id}/items"
+    return [
+        Route("GET", "/categories", lambda i: {"path": "/categories"}, 200, True),
+        Route(
+            "POST",
+            "/categories",
+            lambda i: {
+                "path": "/categories",
+                "json": {"name": f"bench_post_{run_id}_{i}"},
+                "headers": auth,
+            },
+            200,
+        ),
+        Route(
+            "GET",
+            "/categories/autocomplete",
+            lambda i: {"path": "/categories/autocomplete?q=cate_1"},
+            200,
+        ),
+        Route(
+            "GET",
+            "/categories/<int:category_id>",
+            lambda i: {"path": "/categories/1"},
+            200,
+            True,
+        ),
+        Route(
+            "DELETE",
+            "/categories/<int:category_id>",
+            lambda i: {
+                "path": f"/categories/{deleted_category_ids[i]}",
+                "headers": auth,
+            },
+            200,
+        ),
+        # No deletion runs in the background, this is the status lookup alone
+        Route(
+            "GET",
+            "/categories/<int:category_id>/deletion",
+            lambda i: {"path": "/categories/1/deletion"},
+            404,
+        ),
+        Route(
+            "GET",
+            "/categories/<int:category_id>/items",
+            lambda i: {"path": "/categories/1/items"},
+            200,
+            True,
+        ),
+        Route(
+            "POST",
+            "/categories/<int:category_id>/items",
+            lambda i: {"path": scratch_items, "json": item(i), "headers": auth},
+            200,
+        ),
+        Route(
+            "POST",
+            "/categories/<int:category_id>/items:batch",
+            lambda i: {
+                "path": f"{scratch_items}:batch",
+                "json": [item(f"{i}_{j}", "batch") for j in range(10)],
+                "headers": auth,
+            },
+            200,
+        ),
+        Route(
+            "POST",
+            "/categories/<int:category_id>/items:import",
+            lambda i: {
+                "path": f"{scratch_items}:import",
+                "data": import_body(i),
+                "content_type": "application/x-ndjson",
+                "headers": auth,
+            },
+            200,
+        ),
+        Route(
+            "GET",
+            "/categories/<int:category_id>/items/export",
+            lambda i: {"path": "/categories/1/items/export"},
+            200,
+        ),
+        Route(
+            "GET",
+            "/categories/<int:category_id>/items/<int:item_id>",
+            lambda i: {"path": "/categories/1/items/1"},
+            200,
+            True,
+        ),
+        Route(
+            "PUT",
+            "/categories/<int:category_id>/items/<int:item_id>",
+            lambda i: {
+                "path": f"{scratch_items}/{item_ids[i]}",
+                "json": item(i, "put"),
+                "headers": auth,
+            },
+            200,
+        ),
+        Route(
+            "DELETE",
+            "/categories/<int:category_id>/items/<int:item_id>",
+            lambda i: {
+                "path": f"{scratch_items}/{deleted_item_ids[i]}",
+                "headers": auth,
+            },
+            200,
+        ),
+        Route(
+            "GET",
+            "/items/autocomplete",
+            lambda i: {"path": "/items/autocomplete?q=item_1"},
+            200,
+        ),
+        Route("GET", "/items/search", lambda i: {"path": "/items/search?q=desc"}, 200),
+        Route(
+            "POST",
+            "/users/signup",
+            lambda i: {
+                "path": "/users/signup",
+                "json": {
+                    "email": f"bench_{run_id}_{i}@gmail.com",
+                    "password": "Abc123",
+                },
+            },
+            200,
+        ),
+        Route(
+            "POST",
+            "/users/auth",
+            lambda i: {
+                "path": "/users/auth",
+                "json": {"email": email, "password": password},
+            },
+            200,
+        ),
+        Route("GET", "/metrics", lambda i: {"path": "/metrics"}, 200),
+        Route(
+            "GET", "/monitoring/caches", lambda i: {"path": "/monitoring/caches"}, 200
+        ),
+        Route("GET", "/monitoring/pool", lambda i: {"path": "/monitoring/pool"}, 200),
+    ]
+
+
+def measure(client, route, requests, warmup, cold=False):
+    """
+    Time `requests` requests, after `warmup` untimed ones fill the caches
+
+    :param cold: <bool> Clear the caches before every request, untimed, to
+        measure their misses
+    """
+    for i in range(warmup):
+        client.open(method=route.method, **route.request(i)).get_data()
+
+    latencies = []
+    errors = 0
+    elapsed = 0
+    for i in range(warmup, warmup + requests):
+        if cold:
+            clear_caches()
+        request_start = time.perf_counter()
+        response = client.open(method=route.method, **route.request(i))
+        response.get_data()
+        latencies.append(time.perf_counter() - request_start)
+        elapsed += latencies[-1]
+        if response.status_code != route.expected_status:
+            errors += 1
+
+    quantiles = statistics.quantiles(latencies, n=100)
+    return {
+        "p50_ms": round(quantiles[49] * 1000, 3),
+        "p99_ms": round(quantiles[98] * 1000, 3),
+        "requests_per_second": round(requests / elapsed, 1),
+        "errors": errors,
+    }
+
+
+def run(args):
+    run_id = uuid4().hex[:8]
+    client = app.test_client()
+    results = {}
+    try:
+        routes = make_routes(run_id, args.warmup + args.requests)
+        _check_coverage(routes)
+
+        print(f"{'route':<64}{'p50 ms':>9}{'p99 ms':>9}{'req/s':>9}{'errors':>8}")
+        for route in routes:
+            name = f"{route.method} {route.rule}"
+            for cold in (False, True) if route.cached else (False,):
+                if cold:
+                    name = f"{name} (cold)"
+                results[name] = stats = measure(
+                    client, route, args.requests, args.warmup, cold=cold
+                )
+                print(
+                    f"{name:<64}{stats['p50_ms']:>9.2f}{stats['p99_ms']:>9.2f}"
+                    f"{stats['requests_per_second']:>9.0f}{stats['errors']:>8}"
+                )
+    finally:
+        # Later runs measure the same database
+        _delete_run_rows(run_id)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(
+                {"database": db.engine.url.get_backend_name(), "routes": results},
+                file,
+                indent=2,
+            )
+        print(f"Saved to {args.save}")
+
+
+def compare(args):
+    with open(args.baseline) as file:
+        baseline = json.load(file)["routes"]
+    with open(args.results) as file:
+        results = json.load(file)["routes"]
+
+    regressions = []
+    print(f"{'route':<64}{'p50':>9}{'p99':>9}{'errors':>8}")
+    for name in sorted(baseline.keys() - results.keys()):
+        print(f"{name:<64}{'missing':>9}")
+        regressions.append(name)
+
+    for name, stats in results.items():
+        if name not in baseline:
+            print(f"{name:<64}{'new':>9}")
+            continue
+
+        thresholds = {"p50_ms": args.threshold, "p99_ms": args.p99_threshold}
+        changes = {
+            key: stats[key] / baseline[name][key] - 1
+            for key in thresholds
+            if baseline[name][key]
+        }
+        new_errors = stats["errors"] - baseline[name]["errors"]
+        print(
+            f"{name:<64}{changes.get('p50_ms', 0):>+9.0%}"
+            f"{changes.get('p99_ms', 0):>+9.0%}{new_errors:>+8}"
+        )
+        if new_errors > 0 or any(
+            change > thresholds[key] for key, change in changes.items()
+        ):
+            regressions.append(name)
+
+    if regressions:
+        print(
+            f"\nMissing, with more errors, p50 slower by more than "
+            f"{args.threshold:.0%} or p99 by more than {args.p99_threshold:.0%}:"
+        )
+        for name in regressions:
+            print(f"  {name}")
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed", help="Recreate and fill the database")
+    seed_parser.add_argument("--users", type=int, default=100)
+    seed_parser.add_argument("--categories-per-user", type=int, default=10)
+    seed_parser.add_argument("--item-categories", type=int, default=100)
+    seed_parser.add_argument("--items-per-category", type=int, default=100)
+    seed_parser.add_argument(
+        "--yes",
+        action="store_true",
+        help="Drop the tables of a database other than the test one",
+    )
+    seed_parser.set_defaults(func=seed)
+
+    run_parser = commands.add_parser("run", help="Measure every route")
+    run_parser.add_argument("--requests", type=int, default=200)
+    run_parser.add_argument("--warmup", type=int, default=10)
+    run_parser.add_argument("--save", help="Write the results to this JSON file")
+    run_parser.set_defaults(func=run)
+
+    compare_parser = commands.add_parser(
+        "compare", help="Fail when a route is slower than in the baseline"
+    )
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--threshold", type=float, default=0.25)
+    # Tail latencies are noisier
+    compare_parser.add_argument("--p99-threshold", type=float, default=1.0)
+    compare_parser.set_defaults(func=compare)
+
+    args = parser.parse_args()
+    with app.app_context():
+        args.func(args)
+
+
+def _insert_categories(run_id, count):
+    names = [f"bench_deleted_{run_id}_{i}" for i in range(count)]
+    db.session.execute(
+        CategoryModel.__table__.insert(),
+        [{"name": name, "user_id": 1} for name in names],
+    )
+    db.session.commit()
+    rows = db.session.query(CategoryModel.id).filter(CategoryModel.name.in_(names))
+    return [category_id for (category_id,) in rows.order_by(CategoryModel.id)]
+
+
+def _insert_items(category_id, prefix, count):
+    names = [f"{prefix}_{i}" for i in range(count)]
+    db.session.execute(
+        ItemModel.__table__.insert(),
+        [
+            {"name": name, "description": "written", "category_id": category_id}
+            for name in names
+        ],
+    )
+    CategoryModel.record_item_write(category_id, count)
+    db.session.commit()
+    rows = db.session.query(ItemModel.id).filter(ItemModel.name.in_(names))
+    return [item_id for (item_id,) in rows.order_by(ItemModel.id)]
+
+
+def _delete_run_rows(run_id):
+    db.session.rollback()
+    category_ids = db.session.query(CategoryModel.id).filter(
+        CategoryModel.name.like(f"bench_%{run_id}%")
+    )
+    ItemModel.query.filter(ItemModel.category_id.in_(category_ids)).delete(
+        synchronize_session=False
+    )
+    CategoryModel.query.filter(CategoryModel.name.like(f"bench_%{run_id}%")).delete(
+        synchronize_session=False
+    )
+    UserModel.query.filter(UserModel.email.like(f"bench_{run_id}_%")).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+
+
+def _check_coverage(routes):
+    covered = {(route.method, route.rule) for route in routes}
+    missing = [
+        f"{method} {rule.rule}"
+        for rule in app.url_map.iter_rules()
+        if rule.endpoint != "static"
+        for method in rule.methods - {"HEAD", "OPTIONS"}
+        if (method, rule.rule) not in covered
+    ]
+    if missing:
+        sys.exit(f"No benchmark for {', '.join(sorted(missing))}")
+
+
+if __name__ == "__main__":
+    main()
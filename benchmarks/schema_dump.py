@@ -0,0 +1,63 @@
+"""
+Dumps per second of a 20-item list page, per schema path
+
+    python -m benchmarks.schema_dump [--pages 5000]
+"""
+import argparse
+import time
+
+from flask_sqlalchemy import Pagination
+from marshmallow import fields
+
+from main.models.item import ItemModel
+from main.schemas.base import PaginationSchema
+from main.schemas.item import ItemSchema, item_list_schema
+
+
+class NestedItemListSchema(PaginationSchema):
+    """The item list schema as dumped through marshmallow's own Nested field"""
+
+    items = fields.Nested(ItemSchema(), many=True)
+
+
+def make_page(per_page):
+    items = [
+        ItemModel(id=i, name=f"item_{i}", description=f"desc_{i}", category_id=1)
+        for i in range(1, per_page + 1)
+    ]
+    return Pagination(None, 1, per_page, 1000, items)
+
+
+def measure(pages, page, dump):
+    start = time.perf_counter()
+    for _ in range(pages):
+        dump(page)
+    elapsed = time.perf_counter() - start
+
+    return pages / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=5000)
+    parser.add_argument("--per-page", type=int, default=20)
+    args = parser.parse_args()
+
+    page = make_page(args.per_page)
+    nested_list_schema = NestedItemListSchema()
+    paths = [
+        ("new schema per call", lambda p: NestedItemListSchema().dump(p)),
+        ("shared schema", nested_list_schema.dump),
+        ("shared, fast dump", item_list_schema.dump),
+    ]
+    assert item_list_schema.dump(page) == nested_list_schema.dump(page)
+
+    results = [(name, measure(args.pages, page, dump)) for name, dump in paths]
+    baseline = results[0][1]
+    print(f"{'path':<24}{'dumps/s':>10}{'speedup':>10}")
+    for name, rate in results:
+        print(f"{name:<24}{rate:>10.0f}{rate / baseline:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
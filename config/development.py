@@ -3,3 +3,9 @@ from .base import BaseConfig
 
 class Config(BaseConfig):
     DEBUG = True
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **BaseConfig.SQLALCHEMY_ENGINE_OPTIONS,
+        "pool_size": 5,
+        "max_overflow": 5,
+    }
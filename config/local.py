@@ -5,3 +5,9 @@ class Config(BaseConfig):
     DEBUG = True
     TESTING = False
     JSONIFY_PRETTYPRINT_REGULAR = False
+
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **BaseConfig.SQLALCHEMY_ENGINE_OPTIONS,
+        "pool_size": 5,
+        "max_overflow": 5,
+    }
@@ -2,4 +2,11 @@ from .base import BaseConfig
 
 
 class Config(BaseConfig):
-    pass
+    # Sized for gunicorn workers running 16 threads each
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        **BaseConfig.SQLALCHEMY_ENGINE_OPTIONS,
+        "pool_size": 16,
+        "max_overflow": 8,
+        "pool_timeout": 5,
+        "pool_recycle": 1800,
+    }
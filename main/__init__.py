@@ -3,15 +3,18 @@ from importlib import import_module
 from flask import Flask
 from flask_cors import CORS
 from flask_migrate import Migrate
-from flask_sqlalchemy import SQLAlchemy
 
 from main.commons.error_handlers import register_error_handlers
 from main.config import config
+from main.engines.instrumentation import register_instrumentation
+from main.engines.pool import InstrumentedQueuePool
+from main.engines.profiler import register_profiling
+from main.engines.routing import RoutingSQLAlchemy
 
 app = Flask(__name__)
 app.config.from_object(config)
 
-db = SQLAlchemy(app)
+db = RoutingSQLAlchemy(app, engine_options={"poolclass": InstrumentedQueuePool})
 migrate = Migrate(app, db)
 
 
@@ -24,8 +27,11 @@ def register_subpackages():
     for m in models.__all__:
         import_module("main.models." + m)
 
+    import main.commands  # noqa
     import main.controllers  # noqa
 
 
 register_subpackages()
 register_error_handlers(app)
+register_instrumentation(app)
+register_profiling(app)
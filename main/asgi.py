@@ -0,0 +1,262 @@
+"""
+ASGI application serving the catalog's read paths on SQLAlchemy's asyncio engine
+
+GET /categories, /categories/<id>, /categories/<id>/items and
+/categories/<id>/items/<id> wait on the db without holding a thread, so one
+worker serves many concurrent connections. They read from the primary, not
+from SQLALCHEMY_REPLICA_BINDS. Every other request is handed to the WSGI app
+on asgiref's thread pool.
+
+The name indexes of autocomplete are built on lifespan startup, before the
+first request is served.
+"""
+import asyncio
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import request
+from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from main import app as wsgi_app
+from main import config
+from main.commons.exceptions import (
+    BadRequest,
+    CategoryNotFound,
+    ItemNotFound,
+    ValidationError,
+)
+from main.commons.lookups import load_by_id, load_category_and_item
+from main.controllers import category, item
+from main.engines.autocomplete import warm_name_indexes
+from main.libs.http import conditional_response, is_not_modified
+from main.libs.response_cache import cached_json_response_async
+from main.models.category import CategoryModel
+from main.schemas.base import PaginationSchema
+from main.schemas.category import category_schema
+from main.schemas.item import ItemListQuerySchema, item_schema
+
+# Drivers of the sync database URLs, by their asyncio counterpart
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+pagination_schema = PaginationSchema()
+item_list_query_schema = ItemListQuerySchema()
+
+
+def get_async_database_uri():
+    if config.ASYNC_SQLALCHEMY_DATABASE_URI:
+        return config.ASYNC_SQLALCHEMY_DATABASE_URI
+
+    url = make_url(config.SQLALCHEMY_DATABASE_URI)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+engine = create_async_engine(
+    get_async_database_uri(),
+    poolclass=AsyncAdaptedQueuePool,
+    **config.SQLALCHEMY_ENGINE_OPTIONS,
+)
+
+
+async def get_category_list():
+    data = _load_args(pagination_schema)
+    version = await _run(category.get_category_list_version)
+    key = category.get_category_list_key(version, data)
+
+    async def render():
+        return await _run(category.render_category_list, version, data)
+
+    return await _conditional_response(
+        lambda: cached_json_response_async(key, render), key
+    )
+
+
+async def get_category(category_id):
+    found = await _run(load_by_id, CategoryModel, category_id)
+    if not found:
+        raise CategoryNotFound()
+
+    return await _conditional_response(
+        _as_coroutine(lambda: category_schema.fast_dump(found)),
+        category.get_category_etag(found),
+        found.updated_time,
+    )
+
+
+async def get_item_list(category_id):
+    found = await _run(load_by_id, CategoryModel, category_id)
+    if not found:
+        raise CategoryNotFound()
+    data = _load_args(item_list_query_schema)
+    items_version, item_count = await _run(CategoryModel.get_item_state, found.id)
+    key = item.get_item_list_key(found.id, items_version, data)
+
+    async def render():
+        return await _run(item.render_item_list, found.id, item_count, data)
+
+    return await _conditional_response(
+        lambda: cached_json_response_async(key, render), key
+    )
+
+
+async def get_item(category_id, item_id):
+    found_item, items_version = await _run(_load_item, category_id, item_id)
+
+    return await _conditional_response(
+        _as_coroutine(lambda: item_schema.fast_dump(found_item)),
+        item.get_item_etag(found_item, items_version),
+        found_item.updated_time,
+    )
+
+
+def _load_item(category_id, item_id, session):
+    found_category, found_item = load_category_and_item(
+        category_id, item_id, session=session
+    )
+    if not found_category:
+        raise CategoryNotFound()
+    if not found_item or found_category.id != found_item.category_id:
+        raise ItemNotFound()
+
+    found_item, items_version = item.load_current_item(
+        found_category, found_item, session
+    )
+    if not found_item:
+        raise ItemNotFound()
+    return found_item, items_version
+
+
+# Async views, by the endpoint of the WSGI view they stand in for
+VIEWS = {
+    "get_category_list": get_category_list,
+    "get_category": get_category,
+    "get_item_list": get_item_list,
+    "get_item": get_item,
+}
+
+
+class AsyncReadApp:
+    """
+    :param on_startup: <list> Functions run on lifespan startup, on a thread
+        of the event loop's executor, each given the Flask app
+    """
+
+    def __init__(self, flask_app, views, on_startup=()):
+        self.flask_app = flask_app
+        self.views = views
+        self.on_startup = list(on_startup)
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.url_adapter = flask_app.url_map.bind("")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+
+        view, view_args = self._match(scope)
+        if view is None:
+            await self.wsgi(scope, receive, send)
+            return
+
+        environ = EnvironBuilder(
+            path=scope["path"],
+            query_string=scope["query_string"].decode("latin-1"),
+            headers=[
+                (name.decode("latin-1"), value.decode("latin-1"))
+                for name, value in scope["headers"]
+            ],
+        ).get_environ()
+        with self.flask_app.request_context(environ):
+            # As Flask.full_dispatch_request, but awaiting the view
+            try:
+                # Runs the before_request hooks, such as the metrics and the
+                # profiler. A hook returning a response stands in for the view
+                response = self.flask_app.preprocess_request()
+                if response is None:
+                    response = await view(**view_args)
+            except Exception as e:
+                response = self.flask_app.handle_user_exception(e)
+            # Runs the after_request hooks, such as the CORS headers
+            response = self.flask_app.finalize_request(response)
+
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name.encode("latin-1"), value.encode("latin-1"))
+                    for name, value in response.headers.items()
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": response.get_data()})
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                try:
+                    for func in self.on_startup:
+                        await loop.run_in_executor(None, func, self.flask_app)
+                except Exception as e:
+                    await send({"type": "lifespan.startup.failed", "message": str(e)})
+                    return
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    def _match(self, scope):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return None, None
+
+        try:
+            endpoint, view_args = self.url_adapter.match(scope["path"], method="GET")
+        except HTTPException:
+            return None, None
+        return self.views.get(endpoint), view_args
+
+
+async def _run(func, *args):
+    """
+    Call `func(*args, session=...)` with a sync Session over the async engine
+
+    SQLAlchemy runs it in a greenlet, so its queries await the async driver
+    and the event loop keeps serving other requests meanwhile.
+    """
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        return await session.run_sync(
+            lambda sync_session: func(*args, session=sync_session)
+        )
+
+
+async def _conditional_response(render, etag, last_modified=None):
+    """As conditional_response, for a coroutine function `render`"""
+    body = None
+    if not is_not_modified(etag, last_modified):
+        body = await render()
+    return conditional_response(lambda: body, etag, last_modified)
+
+
+def _as_coroutine(func):
+    async def render():
+        return func()
+
+    return render
+
+
+def _load_args(schema):
+    # As validate_input does
+    try:
+        return schema.load(dict(request.args))
+    except MarshmallowValidationError as error:
+        raise ValidationError(error_data=error.messages)
+    except Exception as e:
+        raise BadRequest(error_message=str(e))
+
+
+app = AsyncReadApp(wsgi_app, VIEWS, on_startup=[warm_name_indexes])
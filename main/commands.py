@@ -0,0 +1,65 @@
+import click
+from flask.cli import AppGroup
+
+from main import app, config, db
+from main.engines.importer import FORMATS, import_items, parse_rows
+from main.engines.profiler import PROFILE_HEADER, make_profile_token
+from main.models.category import CategoryModel
+from main.models.data_change import DataChangeModel
+
+items_cli = AppGroup("items", help="Manage catalog items.")
+changes_cli = AppGroup("changes", help="Manage the log of written rows.")
+profiles_cli = AppGroup("profiles", help="Profile requests.")
+
+
+@items_cli.command("import")
+@click.argument("category_id", type=int)
+@click.argument("file", type=click.File("rb"))
+@click.option("--format", "format_", type=click.Choice(FORMATS), default="ndjson")
+def import_items_command(category_id, file, format_):
+    """Import items of CATEGORY_ID from an NDJSON or CSV FILE, - for stdin."""
+    if CategoryModel.query.filter_by(id=category_id).one_or_none() is None:
+        raise click.BadParameter("Category not found", param_hint="CATEGORY_ID")
+
+    report = import_items(category_id, parse_rows(file, format_))
+
+    click.echo(
+        f"Imported {report['imported']} items, rejected {report['rejected']} "
+        f"in {report['seconds']}s ({report['rows_per_second']} rows/s)"
+    )
+    for error in report["errors"]:
+        click.echo(f"line {error['line']}: {error['errors']}", err=True)
+
+
+@items_cli.command("reindex")
+def reindex_items_command():
+    """Have every search and autocomplete index rebuilt from the db."""
+    # Changes of every row of a kind have every process rebuild its indexes
+    DataChangeModel.record(DataChangeModel.CATEGORY)
+    DataChangeModel.record(DataChangeModel.ITEM)
+    db.session.commit()
+    click.echo("Indexes will be rebuilt in the background on their next lookup")
+
+
+@changes_cli.command("prune")
+def prune_changes_command():
+    """Delete the changes older than CHANGE_RETENTION."""
+    count = DataChangeModel.prune(config.CHANGE_RETENTION)
+    click.echo(f"Deleted {count} changes")
+
+
+@profiles_cli.command("token")
+@click.option("--ttl", type=int, default=3600, help="Seconds the token is valid for.")
+def make_profile_token_command(ttl):
+    """Print a token having the requests sending it profiled."""
+    if not config.PROFILING_ENABLED or not config.PROFILING_SECRET_KEY:
+        raise click.UsageError(
+            "Profiling needs PROFILING_ENABLED and PROFILING_SECRET_KEY"
+        )
+
+    click.echo(f"{PROFILE_HEADER}: {make_profile_token(ttl)}")
+
+
+app.cli.add_command(items_cli)
+app.cli.add_command(changes_cli)
+app.cli.add_command(profiles_cli)
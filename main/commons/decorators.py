@@ -11,9 +11,9 @@ from main.commons.exceptions import (
     LackingAccessToken,
     ValidationError,
 )
+from main.commons.lookups import load_by_id, load_category_and_item
 from main.libs.utils import decode_jwt_token
 from main.models.category import CategoryModel
-from main.models.item import ItemModel
 
 
 def jwt_required(func):
@@ -29,12 +29,15 @@ def jwt_required(func):
     return decorator
 
 
-def validate_input(schema):
+def validate_input(schema, many=False):
+    # Built once per view rather than on every request
+    schema_instance = schema(many=many)
+
     def decorator(func):
         @wraps(func)
         def wrapper(**kwargs):
             try:
-                data = schema().load(_get_request_data())
+                data = schema_instance.load(_get_request_data())
 
             except MarshmallowValidationError as error:
                 raise ValidationError(error_data=error.messages)
@@ -52,7 +55,7 @@ def validate_input(schema):
 def check_existing_category(func):
     @wraps(func)
     def wrapper(**kwargs):
-        category = CategoryModel.query.filter_by(id=kwargs["category_id"]).one_or_none()
+        category = load_by_id(CategoryModel, kwargs["category_id"])
         if not category:
             raise CategoryNotFound()
         return func(category=category, **kwargs)
@@ -60,13 +63,18 @@ def check_existing_category(func):
     return wrapper
 
 
-def check_existing_item(func):
+def check_existing_category_and_item(func):
     @wraps(func)
     def wrapper(**kwargs):
-        item = ItemModel.query.filter_by(id=kwargs["item_id"]).one_or_none()
-        if not item or kwargs["category"].id != item.category_id:
+        category, item = load_category_and_item(
+            kwargs["category_id"], kwargs["item_id"]
+        )
+        if not category:
+            raise CategoryNotFound()
+        # A cached item may belong to another category
+        if not item or category.id != item.category_id:
             raise ItemNotFound()
-        return func(item=item, **kwargs)
+        return func(category=category, item=item, **kwargs)
 
     return wrapper
 
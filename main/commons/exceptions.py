@@ -12,6 +12,7 @@ class StatusCode:
     NOT_FOUND = 404
     METHOD_NOT_ALLOWED = 405
     INTERNAL_SERVER_ERROR = 500
+    SERVICE_UNAVAILABLE = 503
 
 
 class _ErrorCode:
@@ -33,6 +34,7 @@ class _ErrorCode:
     ITEM_NOT_FOUND = 404002
     METHOD_NOT_ALLOWED = 405000
     INTERNAL_SERVER_ERROR = 500000
+    SERVICE_UNAVAILABLE = 503000
 
 
 class _ErrorMessage:
@@ -54,6 +56,7 @@ class _ErrorMessage:
     ITEM_NOT_FOUND = "Item not found"
     METHOD_NOT_ALLOWED = "Method not allowed."
     INTERNAL_SERVER_ERROR = "Internal server error."
+    SERVICE_UNAVAILABLE = "Service unavailable, please try again later."
 
 
 class BaseError(Exception):
@@ -132,6 +135,12 @@ class InternalServerError(BaseError):
     error_code = _ErrorCode.INTERNAL_SERVER_ERROR
 
 
+class ServiceUnavailable(BaseError):
+    status_code = StatusCode.SERVICE_UNAVAILABLE
+    error_message = _ErrorMessage.SERVICE_UNAVAILABLE
+    error_code = _ErrorCode.SERVICE_UNAVAILABLE
+
+
 class LackingAccessToken(BaseError):
     status_code = StatusCode.UNAUTHORIZED
     error_message = _ErrorMessage.LACKING_ACCESS_TOKEN
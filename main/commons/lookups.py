@@ -0,0 +1,93 @@
+from sqlalchemy import and_
+from sqlalchemy.orm import make_transient_to_detached
+
+from main import db
+from main.engines.cache import lookup_cache
+from main.engines.routing import reading_from_primary
+from main.models.category import CategoryModel
+from main.models.item import ItemModel
+
+
+def load_by_id(model, id_, session=None):
+    """
+    Read-through lookup of a category or item row by primary key
+
+    Cached rows are attached to the session without querying, so the
+    handlers can lazy load relationships, update and delete them as usual.
+    Misses read from the primary, so a lagging replica doesn't cache back a
+    row just invalidated.
+
+    :param session: <Session> Session to query and attach rows to,
+        db.session by default
+    """
+    session = session or db.session
+    key = _get_cache_key(model, id_)
+    row = lookup_cache.get(key)
+    if row is not None:
+        return _attach(session, model, row)
+
+    with reading_from_primary(session):
+        instance = session.query(model).filter_by(id=id_).one_or_none()
+    if instance is not None:
+        lookup_cache.set(key, _to_row(instance))
+    return instance
+
+
+def load_category_and_item(category_id, item_id, session=None):
+    """
+    Look up a category and one of its items in a single round trip
+
+    :param session: <Session> As for load_by_id
+    :return: <tuple> (category, item), where item is None when the category
+        exists but has no such item, and both are None without the category
+    """
+    session = session or db.session
+    category_key = _get_cache_key(CategoryModel, category_id)
+    item_key = _get_cache_key(ItemModel, item_id)
+    category_row = lookup_cache.get(category_key)
+    item_row = lookup_cache.get(item_key)
+    if category_row is not None and item_row is not None:
+        return (
+            _attach(session, CategoryModel, category_row),
+            _attach(session, ItemModel, item_row),
+        )
+
+    # The join condition rather than the WHERE clause carries the item filters,
+    # so a missing item still returns its category
+    on_clause = and_(ItemModel.category_id == CategoryModel.id, ItemModel.id == item_id)
+    with reading_from_primary(session):
+        result = (
+            session.query(CategoryModel, ItemModel)
+            .outerjoin(ItemModel, on_clause)
+            .filter(CategoryModel.id == category_id)
+            .one_or_none()
+        )
+    if result is None:
+        return None, None
+
+    category, item = result
+    lookup_cache.set(category_key, _to_row(category))
+    if item is not None:
+        lookup_cache.set(item_key, _to_row(item))
+    return category, item
+
+
+def invalidate_lookup(model, *ids):
+    lookup_cache.delete(*(_get_cache_key(model, id_) for id_ in ids))
+
+
+def _attach(session, model, row):
+    instance = model(**row)
+    make_transient_to_detached(instance)
+    return session.merge(instance, load=False)
+
+
+def _to_row(instance):
+    return {
+        column.key: getattr(instance, column.key)
+        for column in instance.__table__.columns
+    }
+
+
+def _get_cache_key(model, id_):
+    return f"{model.__tablename__}:{id_}"
@@ -1 +1 @@
-from main.controllers import category, item, user
+from main.controllers import autocomplete, category, item, monitoring, user
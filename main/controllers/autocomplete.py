@@ -0,0 +1,25 @@
+from main import app
+from main.commons.decorators import validate_input
+from main.engines.autocomplete import (
+    category_name_follower,
+    category_name_index,
+    item_name_follower,
+    item_name_index,
+)
+from main.schemas.autocomplete import AutocompleteSchema, name_match_list_schema
+
+
+@app.route("/categories/autocomplete", methods=["GET"])
+@validate_input(AutocompleteSchema)
+def autocomplete_categories(data):
+    category_name_follower.sync()
+    matches = category_name_index.match(data["q"], data["limit"])
+    return name_match_list_schema.dump({"items": matches})
+
+
+@app.route("/items/autocomplete", methods=["GET"])
+@validate_input(AutocompleteSchema)
+def autocomplete_items(data):
+    item_name_follower.sync()
+    matches = item_name_index.match(data["q"], data["limit"])
+    return name_match_list_schema.dump({"items": matches})
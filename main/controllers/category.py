@@ -1,25 +1,66 @@
-from main import app, db
+from main import app, config, db
 from main.commons.decorators import (
     check_existing_category,
     check_owner,
     jwt_required,
     validate_input,
 )
-from main.commons.exceptions import CategoryAlreadyExists
+from main.commons.exceptions import CategoryAlreadyExists, NotFound
+from main.commons.lookups import invalidate_lookup
+from main.engines.jobs import JobRegistry, JobStatus
+from main.engines.routing import reading_from_primary
+from main.libs.http import conditional_response, make_etag
+from main.libs.pagination import cached_count, paginate
+from main.libs.response_cache import cached_json_response, make_response_key
 from main.models.category import CategoryModel
+from main.models.data_change import DataChangeModel
+from main.models.data_version import DataVersionModel
+from main.models.item import ItemModel
 from main.schemas.base import PaginationSchema
-from main.schemas.category import CategoryListSchema, CategorySchema
+from main.schemas.category import (
+    CategorySchema,
+    category_list_schema,
+    category_schema,
+)
+
+# Deletions of categories with more than CATEGORY_ASYNC_DELETE_THRESHOLD items
+deletion_jobs = JobRegistry(max_workers=config.CATEGORY_DELETE_WORKERS)
 
 
 @app.route("/categories", methods=["GET"])
 @validate_input(PaginationSchema)
 def get_category_list(data):
-    pagination = CategoryModel.query.paginate(
-        data["page"], data["per_page"], max_per_page=20, error_out=False
+    version = get_category_list_version(db.session)
+    key = get_category_list_key(version, data)
+    return conditional_response(
+        lambda: cached_json_response(
+            key, lambda: render_category_list(version, data, db.session)
+        ),
+        key,
     )
 
-    response = CategoryListSchema().dump(pagination)
-    return response
+
+def get_category_list_version(session):
+    # Category creations and deletions bump the version in the db, which
+    # versions every page in every process
+    return DataVersionModel.get(DataVersionModel.CATEGORIES, session=session)
+
+
+def get_category_list_key(version, data):
+    return make_response_key("categories", version, data)
+
+
+def render_category_list(version, data, session):
+    # Select only the dumped columns, skipping ORM instance hydration
+    query = session.query(*category_schema.dump_columns(CategoryModel))
+    pagination = paginate(
+        query,
+        CategoryModel.id,
+        data,
+        # Every page of a version shares one COUNT(*), a write starts a new one
+        count=lambda: cached_count(f"categories:{version}", query.count),
+    )
+    return category_list_schema.dump(pagination)
 
 
 @app.route("/categories", methods=["POST"])
@@ -31,6 +72,9 @@ def post_category(user_id, data):
 
     category = CategoryModel(name=data["name"], user_id=user_id)
     db.session.add(category)
+    db.session.flush()
+    DataVersionModel.bump(DataVersionModel.CATEGORIES)
+    DataChangeModel.record(DataChangeModel.CATEGORY, [category.id])
     db.session.commit()
     return {}
 
@@ -38,16 +82,101 @@ def post_category(user_id, data):
 @app.route("/categories/<int:category_id>", methods=["GET"])
 @check_existing_category
 def get_category(category, **__):
-    return CategorySchema().dump(category)
+    return conditional_response(
+        lambda: category_schema.fast_dump(category),
+        get_category_etag(category),
+        category.updated_time,
+    )
+
+
+def get_category_etag(category):
+    return make_etag("category", category.id, category.updated_time)
 
 
 @app.route("/categories/<int:category_id>", methods=["DELETE"])
 @jwt_required
 @check_existing_category
 @check_owner
-def delete_category(category, **__):
-    for item in category.items:
-        db.session.delete(item)
-    db.session.delete(category)
-    db.session.commit()
+def delete_category(category_id, category, **__):
+    threshold = config.CATEGORY_ASYNC_DELETE_THRESHOLD
+    if threshold is not None and category.item_count > threshold:
+        CategoryModel.start_deletion(category_id)
+        # Submitted again when a process running the deletion died, deleting
+        # the items left alongside any other process still running it
+        deletion_jobs.submit(category_id, _delete_category_in_background, category_id)
+        return {"status": JobStatus.RUNNING}, 202
+
+    _delete_category(category_id)
     return {}
+
+
+@app.route("/categories/<int:category_id>/deletion", methods=["GET"])
+def get_category_deletion(category_id):
+    # The deletion may run on another process, its state is read from the db
+    with reading_from_primary(db.session):
+        deleting = (
+            db.session.query(CategoryModel.deleting)
+            .filter_by(id=category_id)
+            .scalar()
+        )
+    # Deleted categories have no row anymore
+    if deleting is None:
+        return {"status": JobStatus.DONE}
+    if not deleting:
+        raise NotFound()
+    return {"status": JobStatus.RUNNING}
+
+
+def _delete_category(category_id):
+    # Items added to the category while it is deleted would fail its final
+    # DELETE on their foreign key, item writes fail from now on instead
+    CategoryModel.start_deletion(category_id)
+    _delete_items_and_category(category_id)
+
+
+def _delete_items_and_category(category_id):
+    # Delete with set-based statements rather than loading every item
+    item_query = ItemModel.query.filter_by(category_id=category_id)
+    chunk_size = config.CATEGORY_DELETE_CHUNK_SIZE
+    if chunk_size:
+        # Commit chunk by chunk so no transaction locks every item at once
+        while True:
+            item_ids = [
+                item_id
+                for (item_id,) in item_query.with_entities(ItemModel.id).limit(
+                    chunk_size
+                )
+            ]
+            if not item_ids:
+                break
+
+            # Fewer when another deletion of the category deleted some first
+            deleted = ItemModel.query.filter(ItemModel.id.in_(item_ids)).delete(
+                synchronize_session=False
+            )
+            CategoryModel.record_item_write(category_id, -deleted, deleting=True)
+            DataChangeModel.record(DataChangeModel.ITEM, item_ids, category_id)
+            db.session.commit()
+    else:
+        item_query.delete(synchronize_session=False)
+
+    CategoryModel.query.filter_by(id=category_id).delete(synchronize_session=False)
+    DataVersionModel.bump(DataVersionModel.CATEGORIES)
+    DataChangeModel.record(DataChangeModel.ITEM, group_id=category_id)
+    DataChangeModel.record(DataChangeModel.CATEGORY, [category_id])
+    db.session.commit()
+
+    # Cached items of the category can't be reached once it is gone
+    invalidate_lookup(CategoryModel, category_id)
+
+
+def _delete_category_in_background(category_id):
+    try:
+        with app.app_context():
+            _delete_items_and_category(category_id)
+    except Exception:
+        # The category is kept with the items left, writes to it resume and
+        # another DELETE may try again
+        with app.app_context():
+            CategoryModel.cancel_deletion(category_id)
+        raise
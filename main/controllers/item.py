@@ -1,28 +1,102 @@
-from main import app, db
+from flask import json, request
+from flask_sqlalchemy import Pagination
+
+from main import app, config, db
 from main.commons.decorators import (
     check_existing_category,
-    check_existing_item,
+    check_existing_category_and_item,
     check_owner,
     jwt_required,
     validate_input,
 )
-from main.commons.exceptions import ItemAlreadyExists
+from main.commons.exceptions import BadRequest, ItemAlreadyExists, ItemNotFound
+from main.commons.lookups import invalidate_lookup
+from main.engines.importer import FORMATS, import_items, parse_rows
+from main.engines.search import ensure_index, search_index
+from main.libs.http import conditional_response, make_etag, streaming_response
+from main.libs.pagination import MAX_PER_PAGE, paginate
+from main.libs.response_cache import cached_json_response, make_response_key
+from main.libs.sorting import get_order_by
+from main.models.category import CategoryModel
+from main.models.data_change import DataChangeModel
 from main.models.item import ItemModel
-from main.schemas.base import PaginationSchema
-from main.schemas.item import ItemListSchema, ItemSchema, ItemUpdateSchema
+from main.schemas.item import (
+    ITEM_SORT_COLUMNS,
+    ItemListQuerySchema,
+    ItemSchema,
+    ItemSearchSchema,
+    ItemUpdateSchema,
+    item_list_schema,
+    item_schema,
+)
 
 
 @app.route("/categories/<int:category_id>/items", methods=["GET"])
 @check_existing_category
-@validate_input(PaginationSchema)
-def get_item_list(category_id, data, **__):
+@validate_input(ItemListQuerySchema)
+def get_item_list(category, data, **__):
+    items_version, item_count = CategoryModel.get_item_state(category.id)
+    key = get_item_list_key(category.id, items_version, data)
+    return conditional_response(
+        lambda: cached_json_response(
+            key,
+            lambda: render_item_list(category.id, item_count, data, db.session),
+        ),
+        key,
+    )
+
+
+def get_item_list_key(category_id, items_version, data):
+    # Every item write in the category bumps its items_version, which serves
+    # as the version of the category's pages
+    return make_response_key(f"items:{category_id}", items_version, data)
+
 
-    pagination = ItemModel.query.filter_by(category_id=category_id).paginate(
-        data["page"], data["per_page"], max_per_page=20, error_out=False
+def render_item_list(category_id, item_count, data, session):
+    query = session.query(ItemModel).filter_by(category_id=category_id)
+    is_filtered = False
+    if "name_prefix" in data:
+        # LIKE 'prefix%' can range scan the (category_id, name) index
+        query = query.filter(
+            ItemModel.name.startswith(data["name_prefix"], autoescape=True)
+        )
+        is_filtered = True
+    if "updated_since" in data:
+        query = query.filter(ItemModel.updated_time >= data["updated_since"])
+        is_filtered = True
+
+    # Select only the dumped columns, skipping ORM instance hydration
+    query = query.with_entities(*item_schema.dump_columns(ItemModel))
+    pagination = paginate(
+        query,
+        ItemModel.id,
+        data,
+        # The maintained counter only holds the total of unfiltered lists
+        count=None if is_filtered else lambda: item_count,
+        order_by=get_order_by(data["sort"], ITEM_SORT_COLUMNS, ItemModel.id),
+    )
+    return item_list_schema.dump(pagination)
+
+
+@app.route("/categories/<int:category_id>/items/export", methods=["GET"])
+@check_existing_category
+def export_items(category, **__):
+    return streaming_response(
+        _export_items(category.id), mimetype="application/x-ndjson"
     )
 
-    response = ItemListSchema().dump(pagination)
-    return response
+
+@app.route("/items/search", methods=["GET"])
+@validate_input(ItemSearchSchema)
+def search_items(data):
+    page = max(data["page"], 1)
+    per_page = min(data["per_page"], MAX_PER_PAGE)
+
+    ensure_index()
+    items, total = search_index.search(
+        data["q"], offset=(page - 1) * per_page, limit=per_page
+    )
+    return item_list_schema.dump(Pagination(None, page, per_page, total, items))
 
 
 @app.route("/categories/<int:category_id>/items", methods=["POST"])
@@ -37,44 +111,171 @@ def post_item(category_id, data, **__):
         raise ItemAlreadyExists()
 
     # Create new item and save to db
+    CategoryModel.record_item_write(category_id, 1)
     item = ItemModel(
         name=data["name"], description=data["description"], category_id=category_id
     )
     db.session.add(item)
+    db.session.flush()
+    DataChangeModel.record(DataChangeModel.ITEM, [item.id], category_id)
     db.session.commit()
+    invalidate_lookup(CategoryModel, category_id)
     return {}
 
 
-@app.route("/categories/<int:category_id>/items/<int:item_id>", methods=["GET"])
+@app.route("/categories/<int:category_id>/items:batch", methods=["POST"])
+@jwt_required
+@validate_input(ItemSchema, many=True)
 @check_existing_category
-@check_existing_item
-def get_item(item, **__):
-    return ItemSchema().dump(item)
+@check_owner
+def post_item_batch(category_id, data, **__):
+    if not 0 < len(data) <= config.ITEM_BATCH_MAX_SIZE:
+        raise BadRequest(
+            error_message="A batch must have between 1 and "
+            f"{config.ITEM_BATCH_MAX_SIZE} items"
+        )
+
+    # Check which item names already exist, in the db or earlier in the batch
+    names = [item["name"] for item in data]
+    existing_names = {
+        name
+        for (name,) in db.session.query(ItemModel.name).filter(
+            ItemModel.name.in_(names)
+        )
+    }
+    errors = {}
+    for index, name in enumerate(names):
+        if name in existing_names:
+            errors[index] = {"name": [ItemAlreadyExists.error_message]}
+        existing_names.add(name)
+    if errors:
+        raise ItemAlreadyExists(error_data=errors)
+
+    # Create all items with a single multi-row insert
+    CategoryModel.record_item_write(category_id, len(data))
+    db.session.execute(
+        ItemModel.__table__.insert(),
+        [{**item, "category_id": category_id} for item in data],
+    )
+    item_ids = [
+        item_id
+        for (item_id,) in db.session.query(ItemModel.id).filter(
+            ItemModel.name.in_(names)
+        )
+    ]
+    DataChangeModel.record(DataChangeModel.ITEM, item_ids, category_id)
+    db.session.commit()
+    invalidate_lookup(CategoryModel, category_id)
+    return {}
+
+
+@app.route("/categories/<int:category_id>/items:import", methods=["POST"])
+@jwt_required
+@check_existing_category
+@check_owner
+def import_item_file(category_id, **__):
+    default_format = "csv" if request.mimetype == "text/csv" else "ndjson"
+    format_ = request.args.get("format", default_format)
+    if format_ not in FORMATS:
+        raise BadRequest(error_message=f"format must be one of {', '.join(FORMATS)}")
+
+    # Parse the upload as it is read rather than loading it whole
+    return import_items(category_id, parse_rows(request.stream, format_))
+
+
+@app.route("/categories/<int:category_id>/items/<int:item_id>", methods=["GET"])
+@check_existing_category_and_item
+def get_item(category, item, **__):
+    item, items_version = load_current_item(category, item, db.session)
+    if not item:
+        raise ItemNotFound()
+
+    return conditional_response(
+        lambda: item_schema.fast_dump(item),
+        get_item_etag(item, items_version),
+        item.updated_time,
+    )
+
+
+def load_current_item(category, item, session):
+    """
+    Check a looked up item against the items_version of its category in the db
+
+    The lookup cache of this process misses the item writes of the others, so
+    the item is read again when its category was written to since it was cached.
+
+    :return: <tuple> (item, or None once deleted, items_version)
+    """
+    items_version, _ = CategoryModel.get_item_state(category.id, session=session)
+    if items_version != category.items_version:
+        invalidate_lookup(CategoryModel, category.id)
+        invalidate_lookup(ItemModel, item.id)
+        # The cached item is in the session already, overwrite its attributes
+        item = (
+            session.query(ItemModel)
+            .populate_existing()
+            .filter_by(id=item.id, category_id=category.id)
+            .one_or_none()
+        )
+    return item, items_version
+
+
+def get_item_etag(item, items_version):
+    # updated_time has a one second resolution, items_version tells apart
+    # writes within the same second
+    return make_etag("item", item.id, item.updated_time, items_version)
 
 
 @app.route("/categories/<int:category_id>/items/<int:item_id>", methods=["PUT"])
 @jwt_required
 @validate_input(ItemUpdateSchema)
-@check_existing_category
-@check_existing_item
+@check_existing_category_and_item
 @check_owner
-def put_item(item, data, **__):
+def put_item(category_id, item_id, item, data, **__):
 
     # Check if item name already exists
     if ItemModel.query.filter_by(name=data["name"]).one_or_none():
         raise ItemAlreadyExists()
 
+    CategoryModel.record_item_write(category_id)
     item.query.filter_by(id=item.id).update(data)
+    DataChangeModel.record(DataChangeModel.ITEM, [item_id], category_id)
     db.session.commit()
+    invalidate_lookup(ItemModel, item_id)
+    invalidate_lookup(CategoryModel, category_id)
     return {}
 
 
 @app.route("/categories/<int:category_id>/items/<int:item_id>", methods=["DELETE"])
 @jwt_required
-@check_existing_category
-@check_existing_item
+@check_existing_category_and_item
 @check_owner
-def delete_item(item, **__):
+def delete_item(category_id, item_id, item, **__):
+    CategoryModel.record_item_write(category_id, -1)
     db.session.delete(item)
+    DataChangeModel.record(DataChangeModel.ITEM, [item_id], category_id)
     db.session.commit()
+    invalidate_lookup(ItemModel, item_id)
+    invalidate_lookup(CategoryModel, category_id)
     return {}
+
+
+def _export_items(category_id):
+    batch_size = config.ITEM_EXPORT_BATCH_SIZE
+    # yield_per streams rows from a server-side cursor in batches, so memory
+    # stays constant whatever the size of the category
+    rows = (
+        ItemModel.query.filter_by(category_id=category_id)
+        .with_entities(*item_schema.dump_columns(ItemModel))
+        .order_by(ItemModel.id)
+        .yield_per(batch_size)
+    )
+
+    lines = []
+    for row in rows:
+        lines.append(f"{json.dumps(item_schema.fast_dump(row))}\n")
+        if len(lines) == batch_size:
+            yield "".join(lines).encode()
+            lines = []
+    if lines:
+        yield "".join(lines).encode()
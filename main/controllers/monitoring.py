@@ -0,0 +1,74 @@
+from main import app, db
+from main.engines import instrumentation
+from main.engines.cache import caches
+from main.engines.pool import collect_pool_stats
+from main.libs.metrics import format_histogram, format_sample
+
+
+@app.route("/monitoring/caches", methods=["GET"])
+def get_cache_stats():
+    return {namespace: cache.stats() for namespace, cache in caches.items()}
+
+
+@app.route("/monitoring/pool", methods=["GET"])
+def get_pool_stats():
+    return collect_pool_stats(db.engine.pool)
+
+
+@app.route("/metrics", methods=["GET"])
+def get_metrics():
+    """Request, cache and connection pool metrics in the Prometheus text format"""
+    lines = [
+        *format_histogram(
+            "http_request_duration_seconds",
+            "Time to handle a request",
+            instrumentation.request_duration.snapshots(),
+        ),
+        *format_histogram(
+            "http_request_db_seconds",
+            "Time a request spent executing SQL statements",
+            instrumentation.request_db_time.snapshots(),
+        ),
+        *format_histogram(
+            "http_request_serialization_seconds",
+            "Time a request spent dumping schemas",
+            instrumentation.request_serialization_time.snapshots(),
+        ),
+        *format_histogram(
+            "http_request_sql_statements",
+            "SQL statements executed by a request",
+            instrumentation.request_statements.snapshots(),
+        ),
+    ]
+
+    cache_stats = [(namespace, cache.stats()) for namespace, cache in caches.items()]
+    for name in ("hits", "misses"):
+        lines += format_sample(
+            f"cache_{name}_total",
+            f"Cache {name}",
+            "counter",
+            [({"cache": namespace}, stats[name]) for namespace, stats in cache_stats],
+        )
+
+    pool_stats = collect_pool_stats(db.engine.pool)
+    for name in ("size", "checked_out", "overflow"):
+        lines += format_sample(
+            f"db_pool_{name}",
+            f"Connection pool {name}",
+            "gauge",
+            [({}, pool_stats[name])],
+        )
+    for name in ("connects", "checkouts", "checkins", "invalidations"):
+        lines += format_sample(
+            f"db_pool_{name}_total",
+            f"Connection pool {name}",
+            "counter",
+            [({}, pool_stats[name])],
+        )
+    lines += format_histogram(
+        "db_pool_wait_seconds",
+        "Time a checkout waited for a free connection",
+        [({}, pool_stats["wait_seconds"])],
+    )
+
+    return "\n".join(lines) + "\n", 200, {"Content-Type": "text/plain; version=0.0.4"}
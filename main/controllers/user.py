@@ -27,6 +27,9 @@ def authenticate_user(data):
     user = UserModel.query.filter_by(email=data["email"]).one_or_none()
 
     if user and user.validate_password(data["password"]):
+        if db.session.is_modified(user):
+            db.session.commit()
+
         jwt_token = generate_jwt_token(user.id)
         return {"access_token": jwt_token}
     raise InvalidEmailOrPassword()
@@ -0,0 +1,182 @@
+from bisect import bisect_left, insort
+from collections import namedtuple
+from heapq import merge
+from threading import Lock
+
+from sqlalchemy import or_
+
+from main import db
+from main.engines.changes import ChangeFollower
+from main.models.category import CategoryModel
+from main.models.data_change import DataChangeModel
+from main.models.item import ItemModel
+
+NameMatch = namedtuple("NameMatch", "id name")
+
+
+class PrefixIndex:
+    """
+    In-process index of names sorted case-insensitively, for prefix lookups
+
+    A lookup bisects to the first name holding the prefix and reads the
+    following ones, so it costs O(log n + limit) whatever the prefix.
+    """
+
+    def __init__(self):
+        # (folded name, id, name) tuples, sorted
+        self._entries = []
+        # id -> (entry, group id)
+        self._ids = {}
+        self._lock = Lock()
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+            self._ids = {}
+
+    def build(self, rows):
+        """:param rows: <iterable> (id, name, group id) tuples"""
+        entries = []
+        ids = {}
+        for id_, name, group_id in rows:
+            entry = (name.casefold(), id_, name)
+            entries.append(entry)
+            ids[id_] = (entry, group_id)
+        entries.sort()
+
+        with self._lock:
+            self._entries = entries
+            self._ids = ids
+
+    def add(self, id_, name, group_id=None):
+        entry = (name.casefold(), id_, name)
+        with self._lock:
+            self._remove(id_)
+            insort(self._entries, entry)
+            self._ids[id_] = (entry, group_id)
+
+    def add_many(self, rows):
+        """
+        Add or replace many names at once, sorting them and merging them in a
+        single pass rather than inserting them one by one
+
+        :param rows: <list> (id, name, group id) tuples
+        """
+        group_ids = {id_: group_id for id_, _, group_id in rows}
+        entries = sorted((name.casefold(), id_, name) for id_, name, _ in rows)
+        if not entries:
+            return
+
+        with self._lock:
+            replaced = {self._ids[id_][0] for id_ in group_ids if id_ in self._ids}
+            kept = self._entries
+            if replaced:
+                kept = [entry for entry in kept if entry not in replaced]
+            self._entries = list(merge(kept, entries))
+            for entry in entries:
+                self._ids[entry[1]] = (entry, group_ids[entry[1]])
+
+    def remove(self, *ids):
+        with self._lock:
+            for id_ in ids:
+                self._remove(id_)
+
+    def remove_group(self, *group_ids):
+        group_ids = set(group_ids)
+        with self._lock:
+            ids = {id_ for id_, (_, group) in self._ids.items() if group in group_ids}
+            if not ids:
+                return
+            # One pass over the entries, rather than one deletion per name
+            self._entries = [entry for entry in self._entries if entry[1] not in ids]
+            for id_ in ids:
+                del self._ids[id_]
+
+    def match(self, prefix, limit):
+        """Return up to `limit` names starting with `prefix`, in name order"""
+        prefix = prefix.casefold()
+        with self._lock:
+            start = bisect_left(self._entries, (prefix,))
+            matches = []
+            for folded, id_, name in self._entries[start : start + limit]:
+                if not folded.startswith(prefix):
+                    break
+                matches.append(NameMatch(id_, name))
+        return matches
+
+    def _remove(self, id_):
+        indexed = self._ids.pop(id_, None)
+        if indexed is None:
+            return
+
+        entry = indexed[0]
+        position = bisect_left(self._entries, entry)
+        if position < len(self._entries) and self._entries[position] == entry:
+            del self._entries[position]
+
+
+def ensure_name_indexes():
+    """Bring both indexes in step with the names written by every process"""
+    category_name_follower.sync()
+    item_name_follower.sync()
+
+
+def warm_name_indexes(app):
+    """Build the indexes as a process starts, rather than on its first lookup"""
+    with app.app_context():
+        ensure_name_indexes()
+
+
+def _build_category_names(session):
+    rows = session.query(CategoryModel.id, CategoryModel.name, db.null())
+    category_name_index.build(rows)
+
+
+def _apply_category_names(session, category_ids, _):
+    rows = session.query(CategoryModel.id, CategoryModel.name, db.null()).filter(
+        CategoryModel.id.in_(category_ids)
+    )
+    rows = [tuple(row) for row in rows]
+    # Deleted categories have no row anymore
+    category_name_index.remove(*category_ids - {row[0] for row in rows})
+    category_name_index.add_many(rows)
+
+
+def _build_item_names(session):
+    rows = session.query(*_item_name_columns())
+    item_name_index.build(rows)
+
+
+def _apply_item_names(session, item_ids, category_ids):
+    """Index again the written items, and the items of the written categories"""
+    rows = session.query(*_item_name_columns()).filter(
+        or_(ItemModel.id.in_(item_ids), ItemModel.category_id.in_(category_ids))
+    )
+    rows = [tuple(row) for row in rows]
+    # Deleted items have no row anymore
+    item_name_index.remove(*item_ids - {row[0] for row in rows})
+    if category_ids:
+        item_name_index.remove_group(*category_ids)
+    item_name_index.add_many(rows)
+
+
+def _item_name_columns():
+    return [ItemModel.id, ItemModel.name, ItemModel.category_id]
+
+
+category_name_index = PrefixIndex()
+# Items are grouped by category, to drop them with their category
+item_name_index = PrefixIndex()
+
+category_name_follower = ChangeFollower(
+    DataChangeModel.CATEGORY,
+    build=_build_category_names,
+    apply=_apply_category_names,
+    clear=category_name_index.clear,
+)
+item_name_follower = ChangeFollower(
+    DataChangeModel.ITEM,
+    build=_build_item_names,
+    apply=_apply_item_names,
+    clear=item_name_index.clear,
+)
@@ -0,0 +1,174 @@
+import pickle
+import time
+from collections import OrderedDict
+from threading import Lock
+
+from main import config
+
+# Every cache created by create_cache(), by namespace
+caches = {}
+
+
+class BaseCache:
+    def __init__(self, ttl):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        value = self._get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        raise NotImplementedError
+
+    def add(self, key, value, ttl=None):
+        """Set the value only if the key is missing, return whether it was set"""
+        raise NotImplementedError
+
+    def delete(self, *keys):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses}
+
+    def _get(self, key):
+        raise NotImplementedError
+
+
+class LRUCache(BaseCache):
+    """In-process cache evicting the least recently used key past max_size"""
+
+    def __init__(self, ttl, max_size):
+        super().__init__(ttl)
+        self.max_size = max_size
+        self._values = OrderedDict()
+        self._lock = Lock()
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._set(key, value, ttl)
+
+    def add(self, key, value, ttl=None):
+        # Checked and set under one lock, so only one of concurrent callers wins
+        with self._lock:
+            cached = self._values.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                return False
+            self._set(key, value, ttl)
+        return True
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._values.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def stats(self):
+        return {**super().stats(), "size": len(self._values)}
+
+    def _set(self, key, value, ttl):
+        self._values[key] = (value, time.monotonic() + (ttl or self.ttl))
+        self._values.move_to_end(key)
+        while len(self._values) > self.max_size:
+            self._values.popitem(last=False)
+
+    def _get(self, key):
+        with self._lock:
+            cached = self._values.get(key)
+            if cached is None:
+                return None
+
+            value, expires_at = cached
+            if expires_at <= time.monotonic():
+                del self._values[key]
+                return None
+
+            self._values.move_to_end(key)
+            return value
+
+
+class RedisCache(BaseCache):
+    """
+    Cache shared by every worker, stored in a Redis-protocol server
+
+    :param client: Any object with the get/set/delete/scan_iter methods of
+        redis.Redis
+    :param namespace: <string> Prefix keeping keys of different caches apart
+    """
+
+    def __init__(self, ttl, client, namespace):
+        super().__init__(ttl)
+        self.client = client
+        self.prefix = f"{namespace}:"
+
+    def set(self, key, value, ttl=None):
+        self.client.set(self.prefix + key, pickle.dumps(value), ex=ttl or self.ttl)
+
+    def add(self, key, value, ttl=None):
+        return bool(
+            self.client.set(
+                self.prefix + key, pickle.dumps(value), ex=ttl or self.ttl, nx=True
+            )
+        )
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*(self.prefix + key for key in keys))
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f"{self.prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+    def _get(self, key):
+        value = self.client.get(self.prefix + key)
+        if value is None:
+            return None
+        return pickle.loads(value)
+
+
+def create_cache(namespace, ttl, max_size, shared=True):
+    """
+    :param shared: <bool> Whether to use the configured CACHE_BACKEND, rather
+        than always keeping values in process
+    """
+    if shared and config.CACHE_BACKEND == "redis":
+        # Optional dependency, only needed when Redis is the configured backend
+        import redis
+
+        client = redis.Redis.from_url(config.CACHE_REDIS_URL)
+        cache = RedisCache(ttl=ttl, client=client, namespace=namespace)
+    else:
+        cache = LRUCache(ttl=ttl, max_size=max_size)
+
+    caches[namespace] = cache
+    return cache
+
+
+def clear_caches():
+    for cache in caches.values():
+        cache.clear()
+
+
+lookup_cache = create_cache(
+    "lookup", ttl=config.LOOKUP_CACHE_TTL, max_size=config.LOOKUP_CACHE_MAX_SIZE
+)
+count_cache = create_cache(
+    "count", ttl=config.COUNT_CACHE_TTL, max_size=config.COUNT_CACHE_MAX_SIZE
+)
+response_cache = create_cache(
+    "response",
+    ttl=config.RESPONSE_CACHE_TTL + config.RESPONSE_CACHE_STALE_TTL,
+    max_size=config.RESPONSE_CACHE_MAX_SIZE,
+)
@@ -0,0 +1,163 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Lock
+
+from flask import current_app
+from sqlalchemy import or_
+
+from main import config, db
+from main.libs.log import ServiceLogger
+from main.models.data_change import DataChangeModel
+
+
+class ChangeFollower:
+    """
+    Keeps an in-process index in step with the DataChangeModel rows of `kind`
+
+    The index is built from the db on its first use. Later uses apply the
+    changes logged since, rather than rebuilding it. A full rebuild, asked for
+    by `flask items reindex` or needed once the index fell behind the pruned
+    log, runs in the background while the current index keeps being used.
+
+    Change ids are allocated when a write inserts them but are seen once it
+    commits, maybe after later ids. The ids skipped over are looked for again
+    for CHANGE_GAP_TIMEOUT seconds, so a slow transaction isn't missed.
+
+    :param build: <callable> Taking a session, fills the index from the db
+    :param apply: <callable> Taking a session, the written row ids and the
+        written groups, updates the index from the current rows
+    :param clear: <callable> Empties the index
+    """
+
+    def __init__(self, kind, build, apply, clear):
+        self.kind = kind
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._build = build
+        self._apply = apply
+        self._clear = clear
+        # Id of the latest change applied, None before the index is built
+        self.watermark = None
+        # Ids skipped over -> monotonic time they are given up at
+        self._gaps = {}
+        self._synced_at = None
+        self._rebuilding = False
+        # Held while building or updating the index
+        self._lock = Lock()
+
+    def sync(self):
+        """Build the index on first use, otherwise apply the changes since"""
+        if self.watermark is None:
+            with self._lock:
+                if self.watermark is None:
+                    self._rebuild(db.session)
+            return
+
+        # Another request is updating the index, this one uses it as it is
+        if not self._lock.acquire(blocking=False):
+            return
+        try:
+            is_stale = self._catch_up(db.session)
+        finally:
+            self._lock.release()
+        if is_stale:
+            self._start_rebuild()
+
+    def reset(self):
+        """Empty the index, built again on its next use"""
+        with self._lock:
+            self._clear()
+            self.watermark = None
+            self._gaps = {}
+            self._synced_at = None
+
+    def _catch_up(self, session):
+        """
+        Apply the changes logged since the last call
+
+        :return: <bool> Whether the index should be rebuilt instead
+        """
+        now = time.monotonic()
+        if now - self._synced_at > config.CHANGE_RETENTION:
+            return True
+        self._gaps = {id_: until for id_, until in self._gaps.items() if until > now}
+
+        while True:
+            changes = self._read_changes(session)
+            if not changes:
+                break
+
+            row_ids = set()
+            group_ids = set()
+            for change in changes:
+                self._gaps.pop(change.id, None)
+                if change.kind != self.kind:
+                    continue
+                if change.row_id is not None:
+                    row_ids.add(change.row_id)
+                elif change.group_id is not None:
+                    group_ids.add(change.group_id)
+                else:
+                    return True
+
+            if row_ids or group_ids:
+                self._apply(session, row_ids, group_ids)
+
+            # Later changes of other kinds are read too, so their ids don't
+            # count as skipped over
+            latest = max(change.id for change in changes)
+            seen = {change.id for change in changes}
+            for id_ in range(self.watermark + 1, latest):
+                if id_ not in seen:
+                    self._gaps[id_] = now + config.CHANGE_GAP_TIMEOUT
+            self.watermark = max(self.watermark, latest)
+            if len(changes) < config.CHANGE_BATCH_SIZE:
+                break
+
+        self._synced_at = now
+        return False
+
+    def _read_changes(self, session):
+        after = DataChangeModel.id > self.watermark
+        if self._gaps:
+            after = or_(after, DataChangeModel.id.in_(self._gaps))
+        return (
+            session.query(
+                DataChangeModel.id,
+                DataChangeModel.kind,
+                DataChangeModel.row_id,
+                DataChangeModel.group_id,
+            )
+            .filter(after)
+            .order_by(DataChangeModel.id)
+            .limit(config.CHANGE_BATCH_SIZE)
+            .all()
+        )
+
+    def _rebuild(self, session):
+        # Changes of transactions still running as the rows are read are
+        # applied again by the next catch up
+        started = datetime.utcnow() - timedelta(seconds=config.CHANGE_GAP_TIMEOUT)
+        watermark = DataChangeModel.last_id(session, before=started)
+        self._build(session)
+        self.watermark = watermark
+        self._gaps = {}
+        self._synced_at = time.monotonic()
+
+    def _start_rebuild(self):
+        if self._rebuilding:
+            return
+        self._rebuilding = True
+        self.executor.submit(
+            self._rebuild_in_background, current_app._get_current_object()
+        )
+
+    def _rebuild_in_background(self, app):
+        try:
+            with app.app_context(), self._lock:
+                self._rebuild(db.session)
+        except Exception as e:
+            # The current index is kept, the next catch up tries again
+            ServiceLogger(__name__).exception(message=str(e), data={"kind": self.kind})
+        finally:
+            self._rebuilding = False
@@ -0,0 +1,30 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+
+
+class ExecutorBusy(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """
+    Runs CPU heavy calls on a fixed number of threads, waiting for the result
+
+    At most `max_workers` calls run at once and `max_pending` more may wait
+    for a thread; callers past that wait up to `timeout` seconds for a slot
+    before ExecutorBusy is raised, so a burst can't take over the CPU.
+    """
+
+    def __init__(self, max_workers, max_pending, timeout):
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._slots = BoundedSemaphore(max_workers + max_pending)
+
+    def run(self, func, *args, **kwargs):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise ExecutorBusy()
+
+        try:
+            return self._executor.submit(func, *args, **kwargs).result()
+        finally:
+            self._slots.release()
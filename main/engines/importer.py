@@ -0,0 +1,120 @@
+import csv
+import io
+import json
+import time
+from itertools import islice
+
+from marshmallow import ValidationError as MarshmallowValidationError
+
+from main import config, db
+from main.commons.exceptions import ItemAlreadyExists
+from main.commons.lookups import invalidate_lookup
+from main.models.category import CategoryModel
+from main.models.data_change import DataChangeModel
+from main.models.item import ItemModel
+from main.schemas.item import item_schema
+
+FORMATS = ("ndjson", "csv")
+
+
+def parse_rows(stream, format_):
+    """
+    Lazily parse an uploaded file into items, line by line
+
+    :param stream: Binary file object of UTF-8 NDJSON, or CSV with a header
+    :param format_: <string> One of FORMATS
+    :return: <iterator> (line number, row) pairs, with a None row for lines
+        that aren't valid JSON objects
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    if format_ == "csv":
+        reader = csv.DictReader(text)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(text, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield line_number, row if isinstance(row, dict) else None
+
+
+def import_items(category_id, rows):
+    """
+    Validate and insert items chunk by chunk, committing every chunk
+
+    Invalid rows and names that already exist are rejected rather than
+    failing the import.
+
+    :param rows: <iterable> (line number, row) pairs, as from parse_rows
+    :return: <dict> Counts of imported and rejected rows, the errors of the
+        first ITEM_IMPORT_MAX_ERRORS rejected ones and the import rate
+    """
+    report = {"imported": 0, "rejected": 0, "errors": []}
+    start = time.perf_counter()
+
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, config.ITEM_IMPORT_CHUNK_SIZE))
+        if not chunk:
+            break
+        _import_chunk(category_id, chunk, report)
+
+    invalidate_lookup(CategoryModel, category_id)
+
+    elapsed = time.perf_counter() - start
+    total = report["imported"] + report["rejected"]
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(total / elapsed) if elapsed else total
+    return report
+
+
+def _import_chunk(category_id, chunk, report):
+    items = []
+    for line_number, row in chunk:
+        if row is None:
+            _reject(report, line_number, {"_schema": ["Invalid JSON object"]})
+            continue
+        try:
+            items.append((line_number, item_schema.load(row)))
+        except MarshmallowValidationError as error:
+            _reject(report, line_number, error.messages)
+
+    # Names must be unique among existing items and earlier rows of the chunk
+    existing_names = {
+        name
+        for (name,) in db.session.query(ItemModel.name).filter(
+            ItemModel.name.in_([item["name"] for _, item in items])
+        )
+    }
+    new_items = []
+    for line_number, item in items:
+        if item["name"] in existing_names:
+            _reject(report, line_number, {"name": [ItemAlreadyExists.error_message]})
+            continue
+        existing_names.add(item["name"])
+        new_items.append({**item, "category_id": category_id})
+
+    if new_items:
+        CategoryModel.record_item_write(category_id, len(new_items))
+        db.session.execute(ItemModel.__table__.insert(), new_items)
+        names = [item["name"] for item in new_items]
+        item_ids = [
+            item_id
+            for (item_id,) in db.session.query(ItemModel.id).filter(
+                ItemModel.name.in_(names)
+            )
+        ]
+        DataChangeModel.record(DataChangeModel.ITEM, item_ids, category_id)
+        db.session.commit()
+        report["imported"] += len(new_items)
+
+
+def _reject(report, line_number, errors):
+    report["rejected"] += 1
+    if len(report["errors"]) < config.ITEM_IMPORT_MAX_ERRORS:
+        report["errors"].append({"line": line_number, "errors": errors})
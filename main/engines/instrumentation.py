@@ -0,0 +1,111 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from main.config import config
+from main.libs.metrics import HistogramFamily
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Per request, labelled by method and route
+request_duration = HistogramFamily(LATENCY_BUCKETS)
+request_db_time = HistogramFamily(LATENCY_BUCKETS)
+request_serialization_time = HistogramFamily(LATENCY_BUCKETS)
+request_statements = HistogramFamily((1, 2, 5, 10, 20, 50, 100))
+
+
+class RequestStats:
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.statements = Counter()
+        self.db_time = 0.0
+        self.serialization_time = 0.0
+        self.is_serializing = False
+
+
+def register_instrumentation(app):
+    app.before_request(_start_request)
+    app.after_request(_finish_request)
+
+
+@contextmanager
+def measure_serialization():
+    """Add the time spent in the block to the request's serialization time"""
+    stats = _get_stats()
+    # Nested schema dumps are already timed by the outermost one
+    if stats is None or stats.is_serializing:
+        yield
+        return
+
+    stats.is_serializing = True
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.serialization_time += time.perf_counter() - start
+        stats.is_serializing = False
+
+
+def _start_request():
+    g.request_stats = RequestStats()
+
+
+def _finish_request(response):
+    stats = g.pop("request_stats", None)
+    if stats is None:
+        return response
+
+    labels = {
+        "method": request.method,
+        # The rule rather than the path keeps the number of label values bounded
+        "route": request.url_rule.rule if request.url_rule else "unmatched",
+    }
+    statement_count = sum(stats.statements.values())
+    request_duration.labels(**labels).observe(time.perf_counter() - stats.start)
+    request_db_time.labels(**labels).observe(stats.db_time)
+    request_serialization_time.labels(**labels).observe(stats.serialization_time)
+    request_statements.labels(**labels).observe(statement_count)
+
+    threshold = config.SQL_STATEMENT_WARNING_THRESHOLD
+    if threshold is not None and statement_count > threshold:
+        # Imported here, main.libs.log reads the config main binds after
+        # importing this module
+        from main.libs.log import ServiceLogger
+
+        statement, repeats = stats.statements.most_common(1)[0]
+        ServiceLogger(__name__).warning(
+            message="Too many SQL statements in one request, N+1 queries?",
+            data={
+                **labels,
+                "statements": statement_count,
+                "most_repeated": {"statement": statement, "repeats": repeats},
+            },
+        )
+    return response
+
+
+def _get_stats():
+    if not has_request_context():
+        return None
+    return g.get("request_stats")
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _get_stats() is not None:
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _get_stats()
+    start_times = conn.info.get("query_start_time")
+    if stats is None or not start_times:
+        return
+
+    stats.db_time += time.perf_counter() - start_times.pop()
+    stats.statements[statement] += 1
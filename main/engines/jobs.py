@@ -0,0 +1,58 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from main.libs.log import ServiceLogger
+
+
+class JobStatus:
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+
+
+class JobRegistry:
+    """
+    Runs jobs on a bounded pool of background threads and keeps their status
+
+    Statuses live in the memory of the process which ran the job; only the
+    latest `max_jobs` of them are kept.
+    """
+
+    def __init__(self, max_workers, max_jobs=1000):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.max_jobs = max_jobs
+        self._statuses = {}
+        self._lock = Lock()
+
+    def submit(self, job_id, func, *args, **kwargs):
+        """Start `func` unless a job with the same id is still pending or running"""
+        with self._lock:
+            if self._statuses.get(job_id) in (JobStatus.PENDING, JobStatus.RUNNING):
+                return self._statuses[job_id]
+
+            self._statuses.pop(job_id, None)
+            self._statuses[job_id] = JobStatus.PENDING
+            while len(self._statuses) > self.max_jobs:
+                del self._statuses[next(iter(self._statuses))]
+
+        self.executor.submit(self._run, job_id, func, *args, **kwargs)
+        return self.get(job_id)
+
+    def get(self, job_id):
+        with self._lock:
+            return self._statuses.get(job_id)
+
+    def _run(self, job_id, func, *args, **kwargs):
+        self._set(job_id, JobStatus.RUNNING)
+        try:
+            func(*args, **kwargs)
+        except Exception as e:
+            ServiceLogger(__name__).exception(message=str(e), data={"job_id": job_id})
+            self._set(job_id, JobStatus.FAILED)
+        else:
+            self._set(job_id, JobStatus.DONE)
+
+    def _set(self, job_id, status):
+        with self._lock:
+            self._statuses[job_id] = status
@@ -0,0 +1,54 @@
+import time
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from main.libs.metrics import Histogram
+
+# Seconds a checkout waited for a free connection
+pool_wait_time = Histogram(
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+
+_event_counts = {"connects": 0, "checkouts": 0, "checkins": 0, "invalidations": 0}
+_event_counts_lock = Lock()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool recording how long each checkout waits for a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_time.observe(time.perf_counter() - start)
+
+
+def collect_pool_stats(pool):
+    with _event_counts_lock:
+        event_counts = dict(_event_counts)
+
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        # Connections opened beyond `size`, negative while the pool fills up
+        "overflow": pool.overflow(),
+        **event_counts,
+        "wait_seconds": pool_wait_time.snapshot(),
+    }
+
+
+def _count_event(name):
+    def listener(*_):
+        with _event_counts_lock:
+            _event_counts[name] += 1
+
+    return listener
+
+
+event.listen(InstrumentedQueuePool, "connect", _count_event("connects"))
+event.listen(InstrumentedQueuePool, "checkout", _count_event("checkouts"))
+event.listen(InstrumentedQueuePool, "checkin", _count_event("checkins"))
+event.listen(InstrumentedQueuePool, "invalidate", _count_event("invalidations"))
@@ -0,0 +1,158 @@
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from hashlib import sha256
+from uuid import uuid4
+
+from flask import g, request
+
+from main import config
+
+# Header of a request asking to be profiled, holding a make_profile_token token
+PROFILE_HEADER = "X-Profile-Token"
+# Header of a profiled response, naming its file in PROFILING_DIRECTORY
+PROFILE_ID_HEADER = "X-Profile-Id"
+SUFFIX = ".collapsed"
+
+_ring_lock = threading.Lock()
+
+
+class StackSampler:
+    """
+    Samples the stack of one thread from a background thread
+
+    The samples are kept in the collapsed format of flamegraph.pl and speedscope,
+    one "outermost;...;innermost" stack per line followed by how many times it
+    was seen.
+    """
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+
+def make_profile_token(ttl):
+    """Return a PROFILE_HEADER value valid for `ttl` seconds"""
+    expires = int(time.time() + ttl)
+    return f"{expires}.{_sign(expires)}"
+
+
+def is_valid_profile_token(token):
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign(expires))
+
+
+def register_profiling(app):
+    app.before_request(_start_profile)
+    app.after_request(_finish_profile)
+    # Stops the sampler of requests failing before after_request
+    app.teardown_request(_stop_profile)
+
+
+def save_profile(stacks, name):
+    """
+    Write `stacks` to PROFILING_DIRECTORY, dropping the oldest profiles beyond
+    PROFILING_MAX_FILES, and return the name of the file
+    """
+    # Names start with the time, so they sort oldest first
+    filename = f"{time.time_ns()}-{_slugify(name)}-{uuid4().hex[:8]}{SUFFIX}"
+    os.makedirs(config.PROFILING_DIRECTORY, exist_ok=True)
+    with open(os.path.join(config.PROFILING_DIRECTORY, filename), "w") as file:
+        for stack, count in stacks.most_common():
+            file.write(f"{stack} {count}\n")
+
+    with _ring_lock:
+        profiles = sorted(
+            profile
+            for profile in os.listdir(config.PROFILING_DIRECTORY)
+            if profile.endswith(SUFFIX)
+        )
+        for old in profiles[: max(len(profiles) - config.PROFILING_MAX_FILES, 0)]:
+            try:
+                os.remove(os.path.join(config.PROFILING_DIRECTORY, old))
+            except FileNotFoundError:
+                # Pruned by another worker already
+                pass
+    return filename
+
+
+def _should_profile():
+    if not config.PROFILING_ENABLED:
+        return False
+
+    token = request.headers.get(PROFILE_HEADER)
+    if token is not None and config.PROFILING_SECRET_KEY:
+        return is_valid_profile_token(token)
+    return random.random() < config.PROFILING_SAMPLE_RATE
+
+
+def _start_profile():
+    if not _should_profile():
+        return
+
+    sampler = StackSampler(threading.get_ident(), config.PROFILING_INTERVAL)
+    sampler.start()
+    g.profile_sampler = sampler
+
+
+def _finish_profile(response):
+    sampler = g.pop("profile_sampler", None)
+    if sampler is None:
+        return response
+
+    stacks = sampler.stop()
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    response.headers[PROFILE_ID_HEADER] = save_profile(
+        stacks, f"{request.method} {route}"
+    )
+    return response
+
+
+def _stop_profile(_):
+    sampler = g.pop("profile_sampler", None)
+    if sampler is not None:
+        sampler.stop()
+
+
+def _sign(expires):
+    return hmac.new(
+        config.PROFILING_SECRET_KEY.encode(), str(expires).encode(), sha256
+    ).hexdigest()
+
+
+def _collapse(frame):
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        filename = os.path.relpath(code.co_filename)
+        names.append(f"{code.co_name} ({filename}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+def _slugify(name):
+    return re.sub(r"[^A-Za-z0-9]+", "_", name).strip("_")
@@ -0,0 +1,133 @@
+import itertools
+import time
+from contextlib import contextmanager
+from threading import Lock
+
+from flask import has_request_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import event, orm
+from sqlalchemy.orm import scoped_session
+
+READ_ONLY_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+class ReplicaSet:
+    """
+    Hands out replica engines round robin
+
+    A replica whose connection fails is ejected, i.e. skipped for
+    `ejection_time` seconds before it is tried again.
+    """
+
+    def __init__(self, engines, ejection_time):
+        self.engines = list(engines)
+        self.ejection_time = ejection_time
+        self._counter = itertools.count()
+        self._ejected_until = {}
+        self._lock = Lock()
+
+        for engine in self.engines:
+            event.listen(engine, "handle_error", self._on_error)
+
+    def choose(self):
+        """Return the next healthy replica, or None when all are ejected"""
+        now = time.monotonic()
+        with self._lock:
+            for _ in self.engines:
+                engine = self.engines[next(self._counter) % len(self.engines)]
+                if self._ejected_until.get(engine, 0) <= now:
+                    return engine
+        return None
+
+    def eject(self, engine):
+        with self._lock:
+            self._ejected_until[engine] = time.monotonic() + self.ejection_time
+
+    def _on_error(self, context):
+        if context.is_disconnect or context.connection is None:
+            self.eject(context.engine)
+
+
+class RoutingSession(SignallingSession):
+    """
+    Session reading from a replica during read-only requests
+
+    Writes, and every statement after a write in the same session, go to the
+    primary, so a request always reads what it has written. A session sticks
+    to the replica it first picked.
+    """
+
+    def __init__(self, db, replicas=None, **options):
+        self.replicas = db.get_replica_set() if replicas is None else replicas
+        self._replica = None
+        self._has_written = False
+        self._reads_primary = False
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **__):
+        if bind is not None:
+            return bind
+
+        primary = super().get_bind(mapper, clause)
+        if self._flushing or getattr(clause, "is_dml", False):
+            self._has_written = True
+
+        # Models with their own __bind_key__ keep their bind
+        if primary is not self.bind or not self._can_use_replica():
+            return primary
+
+        if self._replica is None:
+            self._replica = self.replicas.choose()
+        return self._replica or primary
+
+    def _can_use_replica(self):
+        return (
+            bool(self.replicas)
+            and not self._has_written
+            and not self._reads_primary
+            and has_request_context()
+            and request.method in READ_ONLY_METHODS
+        )
+
+
+@contextmanager
+def reading_from_primary(session):
+    """
+    Route the reads of `session` inside the block to the primary
+
+    For rows kept past the request, which a replica lagging behind the primary
+    would return older than they are. Sessions other than RoutingSessions read
+    as usual.
+    """
+    if isinstance(session, scoped_session):
+        session = session()
+    if not isinstance(session, RoutingSession) or session._reads_primary:
+        yield
+        return
+
+    session._reads_primary = True
+    try:
+        yield
+    finally:
+        session._reads_primary = False
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """SQLAlchemy routing reads to the binds listed in SQLALCHEMY_REPLICA_BINDS"""
+
+    _replica_set = None
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def get_replica_set(self):
+        app = self.get_app()
+        if self._replica_set is None and app.config["SQLALCHEMY_REPLICA_BINDS"]:
+            engines = [
+                self.get_engine(app, bind=bind)
+                for bind in app.config["SQLALCHEMY_REPLICA_BINDS"]
+            ]
+            self._replica_set = ReplicaSet(
+                engines, ejection_time=app.config["REPLICA_EJECTION_TIME"]
+            )
+        return self._replica_set
@@ -0,0 +1,167 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict, namedtuple
+from threading import Lock
+
+from sqlalchemy import or_
+
+from main import config
+from main.engines.changes import ChangeFollower
+from main.models.data_change import DataChangeModel
+from main.models.item import ItemModel
+
+# What a search result holds of an item, enough to dump it with ItemSchema
+SearchDocument = namedtuple("SearchDocument", "id name description category_id")
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class InvertedIndex:
+    """
+    In-process full-text index of item names and descriptions
+
+    Maps every token to the items holding it and how often, weighting name
+    tokens by SEARCH_NAME_WEIGHT. Each process keeps its own index, kept in
+    step with the item writes of every process by search_follower.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._documents = {}
+        self._lock = Lock()
+
+    def clear(self):
+        with self._lock:
+            self._postings = defaultdict(dict)
+            self._documents = {}
+
+    def build(self, documents):
+        postings = defaultdict(dict)
+        indexed = {}
+        for document in documents:
+            indexed[document.id] = document
+            for token, weight in _weigh_tokens(document).items():
+                postings[token][document.id] = weight
+
+        with self._lock:
+            self._postings = postings
+            self._documents = indexed
+
+    def add(self, *documents):
+        with self._lock:
+            for document in documents:
+                self._remove(document.id)
+                self._documents[document.id] = document
+                for token, weight in _weigh_tokens(document).items():
+                    self._postings[token][document.id] = weight
+
+    def remove(self, *item_ids):
+        with self._lock:
+            for item_id in item_ids:
+                self._remove(item_id)
+
+    def remove_category(self, *category_ids):
+        category_ids = set(category_ids)
+        with self._lock:
+            item_ids = [
+                document.id
+                for document in self._documents.values()
+                if document.category_id in category_ids
+            ]
+            for item_id in item_ids:
+                self._remove(item_id)
+
+    def search(self, query, offset, limit):
+        """
+        Rank the items holding every token of `query` by TF-IDF
+
+        :return: <tuple> (documents of the requested slice, total matches)
+        """
+        tokens = set(tokenize(query))
+        if not tokens:
+            return [], 0
+
+        with self._lock:
+            postings = [self._postings.get(token, {}) for token in tokens]
+            # Intersect from the rarest token, which has the fewest items
+            postings.sort(key=len)
+            item_ids = set(postings[0])
+            for posting in postings[1:]:
+                item_ids.intersection_update(posting)
+            if not item_ids:
+                return [], 0
+
+            document_count = len(self._documents)
+            scores = {item_id: 0.0 for item_id in item_ids}
+            for posting in postings:
+                idf = math.log(1 + document_count / len(posting))
+                for item_id in item_ids:
+                    scores[item_id] += posting[item_id] * idf
+
+            ranked = heapq.nsmallest(
+                offset + limit,
+                item_ids,
+                key=lambda item_id: (-scores[item_id], item_id),
+            )
+            page = [self._documents[item_id] for item_id in ranked[offset:]]
+
+        return page, len(item_ids)
+
+    def _remove(self, item_id):
+        document = self._documents.pop(item_id, None)
+        if document is None:
+            return
+
+        for token in _weigh_tokens(document):
+            posting = self._postings[token]
+            posting.pop(item_id, None)
+            if not posting:
+                del self._postings[token]
+
+
+def ensure_index():
+    search_follower.sync()
+
+
+def _build(session):
+    rows = (
+        session.query(*_document_columns())
+        .order_by(ItemModel.id)
+        .yield_per(config.ITEM_EXPORT_BATCH_SIZE)
+    )
+    search_index.build(SearchDocument(*row) for row in rows)
+
+
+def _apply(session, item_ids, category_ids):
+    """Index again the written items, and the items of the written categories"""
+    rows = session.query(*_document_columns()).filter(
+        or_(ItemModel.id.in_(item_ids), ItemModel.category_id.in_(category_ids))
+    )
+    documents = [SearchDocument(*row) for row in rows]
+    # Deleted items have no row anymore
+    search_index.remove(*item_ids - {document.id for document in documents})
+    if category_ids:
+        search_index.remove_category(*category_ids)
+    search_index.add(*documents)
+
+
+def _document_columns():
+    return [getattr(ItemModel, field) for field in SearchDocument._fields]
+
+
+def _weigh_tokens(document):
+    weights = Counter(tokenize(document.description))
+    for token in tokenize(document.name):
+        weights[token] += config.SEARCH_NAME_WEIGHT
+    return weights
+
+
+search_index = InvertedIndex()
+search_follower = ChangeFollower(
+    DataChangeModel.ITEM, build=_build, apply=_apply, clear=search_index.clear
+)
@@ -0,0 +1,73 @@
+import zlib
+from datetime import timezone
+from hashlib import sha1
+
+from flask import Response, make_response, request, stream_with_context
+
+
+def make_etag(*parts):
+    return sha1(":".join(map(str, parts)).encode()).hexdigest()
+
+
+def conditional_response(render, etag, last_modified=None):
+    """
+    Respond 304 when the request's validators still match, without rendering
+
+    :param render: <callable> Returns the response body, only called when the
+        client's copy is stale
+    :param etag: <string> Strong ETag of the current representation
+    :param last_modified: <datetime> Naive UTC time of the last change
+    """
+    if is_not_modified(etag, last_modified):
+        response = make_response("", 304)
+    else:
+        response = make_response(render())
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = _to_http_date(last_modified)
+    return response
+
+
+def is_not_modified(etag, last_modified=None):
+    """Whether the request's validators match, see conditional_response"""
+    if last_modified is not None:
+        last_modified = _to_http_date(last_modified)
+
+    # If-Modified-Since is ignored when If-None-Match is given
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+
+    if_modified_since = request.if_modified_since
+    if if_modified_since is None or last_modified is None:
+        return False
+    return last_modified <= if_modified_since
+
+
+def _to_http_date(last_modified):
+    return last_modified.replace(microsecond=0, tzinfo=timezone.utc)
+
+
+def streaming_response(chunks, mimetype):
+    """
+    Stream `chunks`, gzipped on the fly when the client accepts it
+
+    :param chunks: <iterable> Bytes to send, produced within the request
+        context so it can keep querying the db
+    """
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    response.vary.add("Accept-Encoding")
+    if "gzip" in request.accept_encodings:
+        response.response = _gzip(response.response)
+        response.content_encoding = "gzip"
+    return response
+
+
+def _gzip(chunks):
+    # wbits=31 writes the gzip header and trailer around the deflate stream
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -1,14 +1,128 @@
+import atexit
 import json
 import logging
+import os
 import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from queue import Full, Queue
+from threading import Lock
 
 from main import config
 
 
+class JsonFormatter(logging.Formatter):
+    """Formats a record as one JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "logger": record.name,
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for key in ("data", "suppressed", "dropped"):
+            value = getattr(record, key, None)
+            if value:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """
+    Hands records to a QueueListener thread, which formats and writes them
+
+    Records are dropped rather than blocking the caller when the queue is full,
+    the next record queued counts them as `dropped`.
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.dropped = 0
+        self._lock = Lock()
+
+    def prepare(self, record):
+        # Only what can't wait for the listener is done here: the traceback
+        # refers to frames the caller is about to leave
+        record = logging.makeLogRecord(record.__dict__)
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        with self._lock:
+            record.dropped, self.dropped = self.dropped, 0
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            with self._lock:
+                self.dropped += record.dropped + 1
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets through at most `limit` records of the same level and message per
+    `period` seconds. Errors always pass, the next record let through counts
+    the suppressed ones
+    """
+
+    def __init__(self, limit, period):
+        super().__init__()
+        self.limit = limit
+        self.period = period
+        # (level, message) -> [period start, records, suppressed]
+        self._counts = {}
+        self._lock = Lock()
+
+    def filter(self, record):
+        if self.limit is None or record.levelno >= logging.ERROR:
+            return True
+
+        key = (record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None or now - counts[0] >= self.period:
+                suppressed = counts[2] if counts else 0
+                self._counts[key] = [now, 1, 0]
+                # Messages seen once don't stay in memory forever
+                if len(self._counts) > 10000:
+                    self._prune(now)
+            elif counts[1] < self.limit:
+                counts[1] += 1
+                suppressed, counts[2] = counts[2], 0
+            else:
+                counts[2] += 1
+                return False
+
+        record.suppressed = suppressed
+        return True
+
+    def _prune(self, now):
+        for key, counts in list(self._counts.items()):
+            if now - counts[0] >= self.period:
+                del self._counts[key]
+
+
+stream_handler = logging.StreamHandler(stream=sys.stdout)
+stream_handler.setFormatter(JsonFormatter())
+queue_handler = NonBlockingQueueHandler(Queue(maxsize=config.LOGGING_QUEUE_SIZE))
+
+_listener = None
+_listener_lock = Lock()
+
+
 class ServiceLogger:
     __LOGGERS = {}
 
     def __init__(self, name):
+        _ensure_listener()
         if name in self.__LOGGERS:
             self.logger = self.__LOGGERS[name]
             return
@@ -17,16 +131,13 @@ class ServiceLogger:
         logger = logging.getLogger(name)
         logger.setLevel(config.LOGGING_LEVEL)
 
-        # Append current date time and log level to the beginning of the log message
-        formatter = logging.Formatter(
-            "[%(asctime)s][%(name)s][%(levelname)s] %(message)s"
+        # Records are written as JSON lines by the listener thread, so a slow
+        # stdout never holds up the request
+        if not logger.handlers:
+            logger.addHandler(queue_handler)
+        logger.addFilter(
+            RateLimitFilter(config.LOGGING_RATE_LIMIT, config.LOGGING_RATE_LIMIT_PERIOD)
         )
-
-        handler = logging.StreamHandler(stream=sys.stdout)
-        handler.setFormatter(formatter)
-
-        if not logger.hasHandlers():
-            logger.addHandler(handler)
         logger.propagate = False
 
         self.logger = logger
@@ -49,10 +160,36 @@ class ServiceLogger:
         return self.log(level=logging.CRITICAL, **kwargs)
 
     def log(self, level, message, data=None):
-        if data:
-            message = f"{message} | {json.dumps(data, default=str)}"
+        # Skip building the record of a disabled level
+        if not self.logger.isEnabledFor(level):
+            return
 
+        # `data` is serialized by the listener thread
+        extra = {"data": data}
         if level == logging.CRITICAL:
-            self.logger.exception(message)
+            self.logger.exception(message, extra=extra)
         else:
-            self.logger.log(level, message)
+            self.logger.log(level, message, extra=extra)
+
+
+def _ensure_listener():
+    global _listener
+    if _listener is not None:
+        return
+
+    with _listener_lock:
+        if _listener is None:
+            _listener = QueueListener(queue_handler.queue, stream_handler)
+            _listener.start()
+            # Writes the records still queued on exit
+            atexit.register(_listener.stop)
+
+
+def _forget_listener():
+    global _listener, _listener_lock
+    # Threads don't survive a fork, the child starts its own listener
+    _listener = None
+    _listener_lock = Lock()
+
+
+os.register_at_fork(after_in_child=_forget_listener)
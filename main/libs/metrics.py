@@ -0,0 +1,100 @@
+from bisect import bisect_left
+from threading import Lock
+
+
+class Histogram:
+    """Counts observations into buckets by upper bound, like Prometheus does"""
+
+    def __init__(self, buckets):
+        self.buckets = tuple(sorted(buckets))
+        # The last count is for observations above every bucket
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._lock = Lock()
+
+    def observe(self, value):
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._sum += value
+
+    def snapshot(self):
+        """Return cumulative bucket counts, with "+Inf" counting everything"""
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+
+        buckets = {}
+        cumulative = 0
+        for bound, count in zip(self.buckets, counts):
+            cumulative += count
+            buckets[str(bound)] = cumulative
+        buckets["+Inf"] = sum(counts)
+
+        return {"buckets": buckets, "count": sum(counts), "sum": total}
+
+
+class HistogramFamily:
+    """Histograms of one metric, one per combination of label values"""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self._histograms = {}
+        self._lock = Lock()
+
+    def labels(self, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+        return histogram
+
+    def snapshots(self):
+        """Return (labels, snapshot) pairs"""
+        with self._lock:
+            histograms = list(self._histograms.items())
+        return [(dict(key), histogram.snapshot()) for key, histogram in histograms]
+
+
+def format_histogram(name, help_text, snapshots):
+    """
+    Render histogram snapshots in the Prometheus text format
+
+    :param snapshots: <list> (labels, snapshot) pairs, as from
+        HistogramFamily.snapshots
+    :return: <list> Lines of the metric
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, snapshot in snapshots:
+        for bound, count in snapshot["buckets"].items():
+            bucket_labels = _format_labels({**labels, "le": bound})
+            lines.append(f"{name}_bucket{bucket_labels} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {snapshot['sum']}")
+        lines.append(f"{name}_count{_format_labels(labels)} {snapshot['count']}")
+    return lines
+
+
+def format_sample(name, help_text, type_, samples):
+    """
+    Render counter or gauge samples in the Prometheus text format
+
+    :param samples: <list> (labels, value) pairs
+    """
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {type_}"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+    return lines
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+
+    pairs = ",".join(
+        f'{key}="{_escape_label(value)}"' for key, value in labels.items()
+    )
+    return f"{{{pairs}}}"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
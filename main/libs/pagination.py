@@ -0,0 +1,130 @@
+from flask_sqlalchemy import Pagination
+
+from main.engines.cache import count_cache
+
+MAX_PER_PAGE = 20
+
+
+class KeysetPagination:
+    """
+    A page of rows located by seeking on a unique, ordered key column.
+
+    Unlike flask_sqlalchemy's Pagination it never skips rows with OFFSET and
+    never counts the whole result set, so there is no page number or total.
+    `after` and `before` hold the keys to continue from in each direction,
+    or None when there is nothing more to fetch that way.
+    """
+
+    def __init__(self, items, per_page, after=None, before=None):
+        self.items = items
+        self.per_page = per_page
+        self.after = after
+        self.before = before
+
+
+def is_cursor_request(data):
+    return "after" in data or "before" in data
+
+
+def paginate(query, key_column, data, count=None, order_by=None):
+    """
+    Paginate `query` with the mode requested by PaginationSchema input
+
+    :param query: <Query> Filtered query of the listed rows
+    :param key_column: <Column> Unique column used to seek in cursor mode
+    :param data: <dict> Loaded PaginationSchema data
+    :param count: <callable> Returns the total number of rows, instead of
+        running COUNT(*) over `query`
+    :param order_by: <list> Order of the rows in page mode, by `key_column`
+        when not given. Cursor mode always orders by `key_column`.
+    """
+    if is_cursor_request(data):
+        return keyset_paginate(
+            query,
+            key_column,
+            data["per_page"],
+            after=data.get("after"),
+            before=data.get("before"),
+        )
+
+    return offset_paginate(
+        query,
+        order_by or [key_column],
+        data["page"],
+        data["per_page"],
+        count=count,
+        include_total=data.get("include_total", True),
+    )
+
+
+def offset_paginate(query, order_by, page, per_page, count=None, include_total=True):
+    page = max(page, 1)
+    per_page = min(per_page, MAX_PER_PAGE)
+
+    items = (
+        query.order_by(*order_by).limit(per_page).offset((page - 1) * per_page).all()
+    )
+
+    if not include_total:
+        total = None
+    elif page == 1 and len(items) < per_page:
+        # The first page already holds every row
+        total = len(items)
+    elif count is not None:
+        total = count()
+    else:
+        total = query.order_by(None).count()
+
+    return Pagination(query, page, per_page, total, items)
+
+
+def keyset_paginate(query, key_column, per_page, after=None, before=None):
+    # Fetch one extra row to know whether there is a further page
+    if before is not None:
+        rows = (
+            query.filter(key_column < before)
+            .order_by(key_column.desc())
+            .limit(per_page + 1)
+            .all()
+        )
+        has_more = len(rows) > per_page
+        rows = rows[:per_page][::-1]
+
+        return KeysetPagination(
+            items=rows,
+            per_page=per_page,
+            after=_get_key(rows[-1], key_column) if rows else None,
+            before=_get_key(rows[0], key_column) if has_more else None,
+        )
+
+    if after is not None:
+        query = query.filter(key_column > after)
+    rows = query.order_by(key_column).limit(per_page + 1).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    return KeysetPagination(
+        items=rows,
+        per_page=per_page,
+        after=_get_key(rows[-1], key_column) if has_more else None,
+        before=_get_key(rows[0], key_column) if rows and after is not None else None,
+    )
+
+
+def cached_count(key, count):
+    """
+    Return the result of `count()`, reusing it for COUNT_CACHE_TTL seconds
+
+    Used for totals that have no maintained counter, so repeated list calls
+    don't each run a COUNT(*) over the whole table. `key` should change with
+    every write to the counted rows, so a total is never reused once stale.
+    """
+    total = count_cache.get(key)
+    if total is None:
+        total = count()
+        count_cache.set(key, total)
+    return total
+
+
+def _get_key(row, key_column):
+    return getattr(row, key_column.key)
@@ -0,0 +1,105 @@
+import asyncio
+import time
+
+from flask import Response, json
+
+from main import config
+from main.engines.cache import response_cache
+from main.libs.http import make_etag
+
+# Seconds between checks for a page another request is computing
+POLL_INTERVAL = 0.05
+
+
+def make_response_key(route, version, data):
+    """
+    :param version: Changed by every write to what the route responds with
+    :param data: <dict> Loaded PaginationSchema data, so equivalent query
+        strings share a key
+    """
+    return make_etag(route, version, sorted(data.items()))
+
+
+def cached_json_response(key, render):
+    """
+    Respond with the JSON of `render()`, cached as bytes for RESPONSE_CACHE_TTL
+
+    Only one request recomputes a page at a time. The others serve the expired
+    page meanwhile, or wait for it when there is none.
+    """
+    return Response(_get_or_render(key, render), mimetype="application/json")
+
+
+async def cached_json_response_async(key, render):
+    """
+    As cached_json_response, for a coroutine function `render`
+
+    Waiting for a page another request computes doesn't block the event loop.
+    """
+    body = await _get_or_render_async(key, render)
+    return Response(body, mimetype="application/json")
+
+
+def _get_or_render(key, render):
+    cached = response_cache.get(key)
+    if _is_fresh(cached):
+        return cached[0]
+
+    lock_key = f"{key}:lock"
+    if _lock(lock_key):
+        try:
+            return _store(key, render())
+        finally:
+            response_cache.delete(lock_key)
+
+    if cached is not None:
+        return cached[0]
+
+    deadline = time.monotonic() + config.RESPONSE_CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached[0]
+
+    # The request holding the lock is too slow or has failed
+    return _store(key, render())
+
+
+async def _get_or_render_async(key, render):
+    cached = response_cache.get(key)
+    if _is_fresh(cached):
+        return cached[0]
+
+    lock_key = f"{key}:lock"
+    if _lock(lock_key):
+        try:
+            return _store(key, await render())
+        finally:
+            response_cache.delete(lock_key)
+
+    if cached is not None:
+        return cached[0]
+
+    deadline = time.monotonic() + config.RESPONSE_CACHE_LOCK_TIMEOUT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(POLL_INTERVAL)
+        cached = response_cache.get(key)
+        if cached is not None:
+            return cached[0]
+
+    return _store(key, await render())
+
+
+def _is_fresh(cached):
+    return cached is not None and cached[1] > time.time()
+
+
+def _lock(lock_key):
+    return response_cache.add(lock_key, True, ttl=config.RESPONSE_CACHE_LOCK_TIMEOUT)
+
+
+def _store(key, value):
+    body = f"{json.dumps(value)}\n".encode()
+    response_cache.set(key, (body, time.time() + config.RESPONSE_CACHE_TTL))
+    return body
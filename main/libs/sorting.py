@@ -0,0 +1,35 @@
+def get_sortable_columns(table, filter_column):
+    """
+    Columns that rows of `table` filtered on `filter_column` can be sorted by
+    straight from an index, without a filesort
+
+    :return: <dict> Column by name, for every index whose first column is
+        `filter_column`
+    """
+    columns = {}
+    for index in table.indexes:
+        index_columns = list(index.columns)
+        if len(index_columns) > 1 and index_columns[0].key == filter_column:
+            columns[index_columns[1].key] = index_columns[1]
+    return columns
+
+
+def get_sort_keys(columns):
+    """Sort keys of `columns`, by name ascending or prefixed with - descending"""
+    return sorted([*columns, *(f"-{name}" for name in columns)])
+
+
+def get_order_by(sort_key, columns, tiebreaker):
+    """
+    :param sort_key: <string> One of get_sort_keys(columns)
+    :param tiebreaker: <Column> Unique column ordering rows with equal values.
+        Indexes hold the primary key after their own columns, so ordering by
+        it too still reads the index in order.
+    """
+    descending = sort_key.startswith("-")
+    column = columns[sort_key.lstrip("-")]
+    order_by = [column] if column.key == tiebreaker.key else [column, tiebreaker]
+
+    if descending:
+        return [clause.desc() for clause in order_by]
+    return order_by
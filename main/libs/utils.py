@@ -1,12 +1,93 @@
+import hmac
+import time
 from base64 import b64encode
 from datetime import datetime, timedelta
-from hashlib import sha512
+from hashlib import pbkdf2_hmac, scrypt, sha512
 from os import urandom
 
 import jwt
 
 from main import config
-from main.commons.exceptions import ExpiredAccessToken, InvalidAccessToken
+from main.commons.exceptions import (
+    ExpiredAccessToken,
+    InvalidAccessToken,
+    ServiceUnavailable,
+)
+from main.engines.cache import create_cache
+from main.engines.executor import BoundedExecutor, ExecutorBusy
+
+# Password hashing is kept off the request threads, so a burst of logins can
+# only ever use PASSWORD_HASH_WORKERS cores
+_password_hash_executor = BoundedExecutor(
+    max_workers=config.PASSWORD_HASH_WORKERS,
+    max_pending=config.PASSWORD_HASH_MAX_PENDING,
+    timeout=config.PASSWORD_HASH_TIMEOUT,
+)
+
+# Verified token -> user id, each kept until the token expires
+verified_jwt_cache = create_cache(
+    "jwt", ttl=None, max_size=config.JWT_CACHE_MAX_SIZE, shared=False
+)
+
+
+class ScryptHasher:
+    algorithm = "scrypt"
+
+    def __init__(self, n, r, p):
+        self.n = n
+        self.r = r
+        self.p = p
+
+    @property
+    def prefix(self):
+        return f"{self.algorithm}${self.n}${self.r}${self.p}$"
+
+    def hash(self, password, salt):
+        digest = scrypt(
+            password.encode(),
+            salt=salt.encode(),
+            n=self.n,
+            r=self.r,
+            p=self.p,
+            maxmem=256 * self.r * (self.n + self.p + 2),
+            dklen=64,
+        )
+        return f"{self.prefix}{digest.hex()}"
+
+
+class Pbkdf2Hasher:
+    algorithm = "pbkdf2_sha256"
+
+    def __init__(self, iterations):
+        self.iterations = iterations
+
+    @property
+    def prefix(self):
+        return f"{self.algorithm}${self.iterations}$"
+
+    def hash(self, password, salt):
+        digest = pbkdf2_hmac(
+            "sha256", password.encode(), salt.encode(), self.iterations
+        )
+        return f"{self.prefix}{digest.hex()}"
+
+
+class LegacySha512Hasher:
+    """Single SHA-512 round, only kept to verify and upgrade existing rows"""
+
+    algorithm = "sha512"
+    prefix = ""
+
+    def hash(self, password, salt):
+        return sha512(f"{password}{salt}".encode()).hexdigest()
+
+
+PASSWORD_HASHERS = {hasher.algorithm: hasher for hasher in (ScryptHasher, Pbkdf2Hasher)}
+
+
+def get_password_hasher():
+    hasher = PASSWORD_HASHERS[config.PASSWORD_HASHER]
+    return hasher(**config.PASSWORD_HASHER_COST)
 
 
 def generate_random_salt():
@@ -14,8 +95,20 @@ def generate_random_salt():
 
 
 def generate_hashed_password(password, salt):
-    hashed_password = sha512(f"{password}{salt}".encode())
-    return hashed_password.hexdigest()
+    return _hash_password(get_password_hasher(), password, salt)
+
+
+def verify_password(password, salt, hashed_password):
+    hasher = _identify_password_hasher(hashed_password)
+    password_to_check = _hash_password(hasher, password, salt)
+    return hmac.compare_digest(password_to_check, hashed_password)
+
+
+def password_needs_rehash(hashed_password):
+    """Whether the hash was made with another algorithm or cost than configured"""
+    prefix = get_password_hasher().prefix
+    hashed_prefix, _, _ = hashed_password.rpartition("$")
+    return f"{hashed_prefix}$" != prefix
 
 
 def generate_jwt_token(user_id):
@@ -32,6 +125,10 @@ def generate_jwt_token(user_id):
 
 
 def decode_jwt_token(token):
+    # Only tokens whose signature was verified get cached
+    user_id = verified_jwt_cache.get(token)
+    if user_id is not None:
+        return user_id
 
     try:
         payload = jwt.decode(
@@ -40,10 +137,30 @@ def decode_jwt_token(token):
             algorithms="HS256",
             options={"verify_signature": True, "verify_exp": True},
         )
-        return payload["sub"]
 
     except jwt.ExpiredSignatureError:
         raise ExpiredAccessToken()
 
     except jwt.InvalidTokenError:
         raise InvalidAccessToken()
+
+    time_to_expiry = payload.get("exp", 0) - time.time()
+    if time_to_expiry > 0:
+        verified_jwt_cache.set(token, payload["sub"], ttl=time_to_expiry)
+    return payload["sub"]
+
+
+def _identify_password_hasher(hashed_password):
+    # Hashes from before configurable hashers are bare SHA-512 hex digests
+    if "$" not in hashed_password:
+        return LegacySha512Hasher()
+
+    algorithm, *cost, _ = hashed_password.split("$")
+    return PASSWORD_HASHERS[algorithm](*map(int, cost))
+
+
+def _hash_password(hasher, password, salt):
+    try:
+        return _password_hash_executor.run(hasher.hash, password, salt)
+    except ExecutorBusy:
+        raise ServiceUnavailable()
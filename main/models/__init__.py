@@ -1 +1 @@
-__all__ = ["category", "item", "user"]
+__all__ = ["category", "data_change", "data_version", "item", "user"]
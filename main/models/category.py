@@ -1,13 +1,78 @@
 from main import db
+from main.commons.exceptions import CategoryNotFound
 
 
 class CategoryModel(db.Model):
     __tablename__ = "category"
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(256), unique=True, nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    user_id = db.Column(
+        db.Integer, db.ForeignKey("user.id"), index=True, nullable=False
+    )
+    # Maintained by the item write paths so item lists never need COUNT(*)
+    item_count = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    # Bumped by every item write, versions the category's item list pages
+    items_version = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+    # Set once a deletion starts, which then is the only writer of its items
+    deleting = db.Column(
+        db.Boolean, default=False, server_default=db.false(), nullable=False
+    )
     created_time = db.Column(db.DateTime, default=db.func.now(), nullable=False)
     updated_time = db.Column(
         db.DateTime, default=db.func.now(), onupdate=db.func.now(), nullable=False
     )
     items = db.relationship("ItemModel", back_populates="category")
+
+    @classmethod
+    def get_item_state(cls, category_id, session=None):
+        """
+        Return the (items_version, item_count) of a category as committed, not as
+        held by the lookup cache of this process
+        """
+        session = session or db.session
+        return (
+            session.query(cls.items_version, cls.item_count)
+            .filter_by(id=category_id)
+            .one()
+        )
+
+    @classmethod
+    def record_item_write(cls, category_id, count_delta=0, deleting=False):
+        """
+        Count an item write in the current transaction, before making it
+
+        The category row stays locked until the transaction ends, so a deletion
+        starting meanwhile waits for the write, and writes after it fail.
+
+        :param deleting: <bool> Whether the write is part of the deletion of
+            the category
+        :raise CategoryNotFound: When the category is gone or being deleted
+        """
+        # Increment in SQL so concurrent writers don't overwrite each other
+        updated = cls.query.filter_by(id=category_id, deleting=deleting).update(
+            {
+                cls.item_count: cls.item_count + count_delta,
+                cls.items_version: cls.items_version + 1,
+                # Item writes don't change the category, nor its ETag
+                cls.updated_time: cls.updated_time,
+            },
+            synchronize_session=False,
+        )
+        if not updated:
+            raise CategoryNotFound()
+
+    @classmethod
+    def start_deletion(cls, category_id):
+        """Block the item writes to a category, in their own transaction"""
+        cls.query.filter_by(id=category_id).update(
+            {cls.deleting: True}, synchronize_session=False
+        )
+        db.session.commit()
+
+    @classmethod
+    def cancel_deletion(cls, category_id):
+        """Let the item writes to a category resume, in their own transaction"""
+        cls.query.filter_by(id=category_id).update(
+            {cls.deleting: False}, synchronize_session=False
+        )
+        db.session.commit()
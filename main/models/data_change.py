@@ -0,0 +1,71 @@
+from datetime import datetime, timedelta
+
+from main import db
+
+
+class DataChangeModel(db.Model):
+    """
+    Log of the rows written, followed by the in-process indexes of every process
+
+    A write inserts its rows in its own transaction. Unlike bumping a single
+    version, concurrent writes don't wait on each other to do so.
+    """
+
+    __tablename__ = "data_change"
+    # Item writes, grouped by category
+    ITEM = "item"
+    # Category creations and deletions
+    CATEGORY = "category"
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(32), nullable=False)
+    # The written row, or None for every row of `group_id`, or for every row
+    # of the kind without a group
+    row_id = db.Column(db.Integer)
+    group_id = db.Column(db.Integer)
+    # Set by the app servers rather than the db, so it compares with their clock
+    created_time = db.Column(
+        db.DateTime, default=datetime.utcnow, index=True, nullable=False
+    )
+
+    @classmethod
+    def record(cls, kind, row_ids=(None,), group_id=None):
+        """Log a write of `row_ids` in the current transaction"""
+        now = datetime.utcnow()
+        db.session.execute(
+            cls.__table__.insert(),
+            [
+                {
+                    "kind": kind,
+                    "row_id": row_id,
+                    "group_id": group_id,
+                    "created_time": now,
+                }
+                for row_id in row_ids
+            ],
+        )
+
+    @classmethod
+    def last_id(cls, session, before=None):
+        """
+        Return the id of the latest change, or of the latest one logged before
+        the datetime `before`, 0 when there is none
+        """
+        query = session.query(db.func.max(cls.id))
+        if before is not None:
+            query = query.filter(cls.created_time < before)
+        return query.scalar() or 0
+
+    @classmethod
+    def prune(cls, max_age):
+        """
+        Delete the changes older than `max_age` seconds
+
+        The latest change is kept, so its id isn't allocated again.
+        """
+        count = cls.query.filter(
+            cls.created_time < datetime.utcnow() - timedelta(seconds=max_age),
+            cls.id < cls.last_id(db.session),
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return count
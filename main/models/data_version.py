@@ -0,0 +1,41 @@
+from main import db
+
+
+class DataVersionModel(db.Model):
+    """
+    Versions of data derived from the db and kept outside of it, such as cached
+    pages
+
+    A write bumps the versions depending on it in its own transaction, so every
+    process sees the change as soon as it is committed, whatever cache backend
+    it uses.
+    """
+
+    __tablename__ = "data_version"
+    # Category creations and deletions
+    CATEGORIES = "categories"
+
+    name = db.Column(db.String(64), primary_key=True)
+    value = db.Column(db.Integer, default=0, server_default="0", nullable=False)
+
+    @classmethod
+    def get(cls, name, session=None):
+        session = session or db.session
+        value = session.query(cls.value).filter_by(name=name).scalar()
+        return value or 0
+
+    @classmethod
+    def bump(cls, name):
+        """
+        Increment the version in the current transaction and return its new value
+
+        The row stays locked until the transaction ends, so concurrent writers
+        get consecutive versions.
+        """
+        updated = cls.query.filter_by(name=name).update(
+            {cls.value: cls.value + 1}, synchronize_session=False
+        )
+        if not updated:
+            db.session.add(cls(name=name, value=1))
+            db.session.flush()
+        return cls.get(name)
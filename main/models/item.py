@@ -3,6 +3,13 @@ from main import db
 
 class ItemModel(db.Model):
     __tablename__ = "item"
+    # Serve listing a category's items in each supported sort order, see
+    # get_sortable_columns. The one by id also serves keyset seeks.
+    __table_args__ = (
+        db.Index("ix_item_category_id_id", "category_id", "id"),
+        db.Index("ix_item_category_id_name", "category_id", "name"),
+        db.Index("ix_item_category_id_created_time", "category_id", "created_time"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(256), unique=True, nullable=False)
     description = db.Column(db.String(256), nullable=False)
@@ -1,13 +1,16 @@
-import hmac
-
 from main import db
-from main.libs.utils import generate_hashed_password, generate_random_salt
+from main.libs.utils import (
+    generate_hashed_password,
+    generate_random_salt,
+    password_needs_rehash,
+    verify_password,
+)
 
 
 class UserModel(db.Model):
     __tablename__ = "user"
     id = db.Column(db.Integer, primary_key=True)
-    email = db.Column(db.String(256), nullable=False)
+    email = db.Column(db.String(256), index=True, nullable=False)
     hashed_password = db.Column(db.String(256), nullable=False)
     salt = db.Column(db.String(256), nullable=False)
     created_time = db.Column(db.DateTime, default=db.func.now(), nullable=False)
@@ -21,5 +24,10 @@ class UserModel(db.Model):
         self.hashed_password = generate_hashed_password(password, self.salt)
 
     def validate_password(self, password):
-        password_to_check = generate_hashed_password(password, self.salt)
-        return hmac.compare_digest(password_to_check, self.hashed_password)
+        if not verify_password(password, self.salt, self.hashed_password):
+            return False
+
+        # Upgrade hashes made with an older algorithm or cost
+        if password_needs_rehash(self.hashed_password):
+            self.hashed_password = generate_hashed_password(password, self.salt)
+        return True
@@ -0,0 +1,20 @@
+from marshmallow import fields, validate
+
+from main.schemas.base import BaseSchema, FlatNested
+
+
+class AutocompleteSchema(BaseSchema):
+    q = fields.String(required=True, validate=BaseSchema.length_validator)
+    limit = fields.Integer(load_default=10, validate=validate.Range(1, 20))
+
+
+class NameMatchSchema(BaseSchema):
+    id = fields.Integer()
+    name = fields.String()
+
+
+class NameMatchListSchema(BaseSchema):
+    items = FlatNested(NameMatchSchema(), many=True)
+
+
+name_match_list_schema = NameMatchListSchema()
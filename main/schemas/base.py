@@ -1,31 +1,158 @@
+import binascii
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from operator import attrgetter
+
 from flask import jsonify
-from marshmallow import EXCLUDE, Schema, fields, pre_load, validate
+from marshmallow import (
+    EXCLUDE,
+    Schema,
+    ValidationError,
+    fields,
+    pre_load,
+    validate,
+    validates_schema,
+)
+from marshmallow.decorators import POST_DUMP, PRE_DUMP
+
+from main.engines.instrumentation import measure_serialization
+
+
+# Fields whose dumped value is the attribute itself for rows read from the db
+FLAT_FIELD_TYPES = (fields.Integer, fields.String)
 
 
 class BaseSchema(Schema):
+    """
+    Schemas keep no per-call state, so each module shares one instance of them
+    across requests
+    """
+
     length_validator = validate.And(
         validate.Length(min=1, error="Fields cannot be blank"),
         validate.Length(max=256, error="Maximum length of fields is 256"),
     )
 
+    _fast_dump = None
+
     class Meta:
         unknown = EXCLUDE
 
     def jsonify(self, obj, many=False):
         return jsonify(self.dump(obj, many=many))
 
+    def dump(self, obj, *, many=None):
+        with measure_serialization():
+            return super().dump(obj, many=many)
+
+    def dump_columns(self, model):
+        """
+        Columns of `model` read by `dump`, to query lightweight rows holding
+        only them rather than whole model instances
+        """
+        return [
+            getattr(model, field.attribute or name)
+            for name, field in self.dump_fields.items()
+        ]
+
+    def fast_dump(self, obj):
+        """
+        Dump one object like `dump`, with a row-to-dict function generated
+        for the schema when its dumped fields are all plain Integer and String
+        """
+        if self._fast_dump is None:
+            self._fast_dump = _compile_fast_dump(self)
+        with measure_serialization():
+            return self._fast_dump(obj)
+
     @pre_load
     def strip_whitespace(self, data, **__):
+        # Leave malformed input for the schema to report as a validation error
+        if not isinstance(data, dict):
+            return data
+
         for key, value in data.items():
             if isinstance(value, str):
                 data[key] = value.strip()
         return data
 
 
-class PaginationSchema(BaseSchema):
+class FlatNested(fields.Nested):
+    """Nested field dumping its schema with `fast_dump`"""
+
+    def _serialize(self, nested_obj, attr, obj, **kwargs):
+        if nested_obj is None:
+            return None
+
+        dump = self.schema.fast_dump
+        if self.many:
+            return [dump(value) for value in nested_obj]
+        return dump(nested_obj)
+
+
+class Cursor(fields.Field):
+    """Opaque pagination token wrapping the key of the row to seek from"""
+
+    default_error_messages = {"invalid": "Invalid cursor"}
+
+    def _serialize(self, value, attr, obj, **kwargs):
+        if value is None:
+            return None
+        token = urlsafe_b64encode(json.dumps(value).encode())
+        return token.decode().rstrip("=")
+
+    def _deserialize(self, value, attr, data, **kwargs):
+        # An empty token asks for the first page in cursor mode
+        if value == "":
+            return None
+
+        try:
+            padding = "=" * (-len(value) % 4)
+            key = json.loads(urlsafe_b64decode(f"{value}{padding}".encode()))
+        except (TypeError, ValueError, binascii.Error):
+            raise self.make_error("invalid")
+
+        if not isinstance(key, int) or isinstance(key, bool):
+            raise self.make_error("invalid")
+        return key
+
+
+class OffsetPaginationSchema(BaseSchema):
+    """Pages read by number only"""
+
     # If user input per_page > 20 -> raise Error
     per_page_range_validator = validate.Range(1, 20)
 
     per_page = fields.Integer(load_default=20, validate=per_page_range_validator)
     page = fields.Integer(load_default=1)
     total = fields.Integer(dump_only=True)
+
+
+class PaginationSchema(OffsetPaginationSchema):
+    include_total = fields.Boolean(load_default=True, load_only=True)
+
+    # Giving either cursor switches the list to keyset pagination
+    after = Cursor(allow_none=True)
+    before = Cursor(allow_none=True)
+
+    @validates_schema
+    def validate_single_cursor(self, data, **__):
+        if "after" in data and "before" in data:
+            raise ValidationError(message="Only one of after and before is allowed")
+
+
+def _compile_fast_dump(schema):
+    dump_fields = schema.dump_fields
+    is_flat = dump_fields and all(
+        type(field) in FLAT_FIELD_TYPES and field.attribute is None
+        for field in dump_fields.values()
+    )
+    has_hooks = schema._hooks[PRE_DUMP] or schema._hooks[POST_DUMP]
+    if not is_flat or has_hooks:
+        return schema.dump
+
+    keys = tuple(field.data_key or name for name, field in dump_fields.items())
+    get_values = attrgetter(*dump_fields)
+    if len(keys) == 1:
+        return lambda obj: {keys[0]: get_values(obj)}
+    return lambda obj: dict(zip(keys, get_values(obj)))
@@ -1,6 +1,6 @@
 from marshmallow import fields
 
-from main.schemas.base import BaseSchema, PaginationSchema
+from main.schemas.base import BaseSchema, FlatNested, PaginationSchema
 
 
 class CategorySchema(BaseSchema):
@@ -10,4 +10,8 @@ class CategorySchema(BaseSchema):
 
 
 class CategoryListSchema(PaginationSchema):
-    items = fields.Nested(CategorySchema(), many=True)
+    items = FlatNested(CategorySchema(), many=True)
+
+
+category_schema = CategorySchema()
+category_list_schema = CategoryListSchema()
@@ -1,6 +1,20 @@
-from marshmallow import ValidationError, fields, validates_schema
+from datetime import timezone
 
-from main.schemas.base import BaseSchema, PaginationSchema
+from marshmallow import ValidationError, fields, post_load, validate, validates_schema
+
+from main.libs.pagination import is_cursor_request
+from main.libs.sorting import get_sort_keys, get_sortable_columns
+from main.models.item import ItemModel
+from main.schemas.base import (
+    BaseSchema,
+    FlatNested,
+    OffsetPaginationSchema,
+    PaginationSchema,
+)
+
+# Only orders an index of a category's items can be read in are allowed, so
+# no list sorts the items of a category in memory
+ITEM_SORT_COLUMNS = get_sortable_columns(ItemModel.__table__, "category_id")
 
 
 class ItemSchema(BaseSchema):
@@ -21,4 +35,46 @@ class ItemUpdateSchema(BaseSchema):
 
 
 class ItemListSchema(PaginationSchema):
-    items = fields.Nested(ItemSchema(), many=True)
+    items = FlatNested(ItemSchema(), many=True)
+
+
+class ItemListQuerySchema(PaginationSchema):
+    sort = fields.String(
+        load_default="id",
+        load_only=True,
+        validate=validate.OneOf(get_sort_keys(ITEM_SORT_COLUMNS)),
+    )
+    name_prefix = fields.String(load_only=True, validate=BaseSchema.length_validator)
+    updated_since = fields.DateTime(load_only=True)
+
+    @validates_schema
+    def validate_cursor_sort(self, data, **__):
+        # Cursors hold an id, so they can only seek in id order
+        if is_cursor_request(data) and data["sort"] != "id":
+            raise ValidationError(message="Cursors can only be used with sort=id")
+
+    @post_load
+    def to_naive_utc(self, data, **__):
+        # Times are stored as naive UTC
+        updated_since = data.get("updated_since")
+        if updated_since is not None and updated_since.tzinfo is not None:
+            data["updated_since"] = updated_since.astimezone(timezone.utc).replace(
+                tzinfo=None
+            )
+        return data
+
+
+class ItemSearchSchema(OffsetPaginationSchema):
+    q = fields.String(
+        required=True, load_only=True, validate=BaseSchema.length_validator
+    )
+
+    @validates_schema(pass_original=True)
+    def validate_no_cursor(self, data, original_data, **__):
+        # Results are ranked by relevance, which no cursor can seek in
+        if "after" in original_data or "before" in original_data:
+            raise ValidationError(message="Search results are paginated by page")
+
+
+item_schema = ItemSchema()
+item_list_schema = ItemListSchema()
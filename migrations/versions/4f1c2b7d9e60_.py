@@ -0,0 +1,28 @@
+"""add category item_count
+
+Revision ID: 4f1c2b7d9e60
+Revises: c56030bc9862
+Create Date: 2026-10-17 09:12:40.114203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4f1c2b7d9e60'
+down_revision = 'c56030bc9862'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('category', sa.Column('item_count', sa.Integer(), server_default='0', nullable=False))
+    op.execute(
+        'UPDATE category SET item_count = '
+        '(SELECT COUNT(*) FROM item WHERE item.category_id = category.id)'
+    )
+
+
+def downgrade():
+    op.drop_column('category', 'item_count')
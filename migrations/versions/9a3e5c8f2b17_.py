@@ -0,0 +1,28 @@
+"""add indexes for hot lookup columns
+
+Revision ID: 9a3e5c8f2b17
+Revises: 4f1c2b7d9e60
+Create Date: 2026-10-17 10:03:55.640187
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9a3e5c8f2b17'
+down_revision = '4f1c2b7d9e60'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_user_email'), 'user', ['email'], unique=False)
+    op.create_index(op.f('ix_category_user_id'), 'category', ['user_id'], unique=False)
+    op.create_index('ix_item_category_id_id', 'item', ['category_id', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_item_category_id_id', table_name='item')
+    op.drop_index(op.f('ix_category_user_id'), table_name='category')
+    op.drop_index(op.f('ix_user_email'), table_name='user')
@@ -0,0 +1,36 @@
+"""add data_change
+
+Revision ID: a7d4e2c9b185
+Revises: f3a8c51d07b2
+Create Date: 2026-10-19 10:12:44.530917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7d4e2c9b185'
+down_revision = 'f3a8c51d07b2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('data_change',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=32), nullable=False),
+    sa.Column('row_id', sa.Integer(), nullable=True),
+    sa.Column('group_id', sa.Integer(), nullable=True),
+    sa.Column('created_time', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_data_change_created_time'), 'data_change', ['created_time'], unique=False)
+    # Item writes are logged in data_change rather than versioned here
+    op.execute("DELETE FROM data_version WHERE name = 'items'")
+
+
+def downgrade():
+    op.execute("INSERT INTO data_version (name, value) VALUES ('items', 0)")
+    op.drop_index(op.f('ix_data_change_created_time'), table_name='data_change')
+    op.drop_table('data_change')
@@ -0,0 +1,26 @@
+"""add indexes for sorted item lists
+
+Revision ID: b83f0d6a41c2
+Revises: d27b84c1f5a9
+Create Date: 2026-10-17 17:12:40.318954
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b83f0d6a41c2'
+down_revision = 'd27b84c1f5a9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_item_category_id_name', 'item', ['category_id', 'name'], unique=False)
+    op.create_index('ix_item_category_id_created_time', 'item', ['category_id', 'created_time'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_item_category_id_created_time', table_name='item')
+    op.drop_index('ix_item_category_id_name', table_name='item')
@@ -0,0 +1,24 @@
+"""add category items_version
+
+Revision ID: d27b84c1f5a9
+Revises: 9a3e5c8f2b17
+Create Date: 2026-10-17 11:26:08.391542
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd27b84c1f5a9'
+down_revision = '9a3e5c8f2b17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('category', sa.Column('items_version', sa.Integer(), server_default='0', nullable=False))
+
+
+def downgrade():
+    op.drop_column('category', 'items_version')
@@ -0,0 +1,32 @@
+"""add data_version
+
+Revision ID: e61b2f7c4a93
+Revises: b83f0d6a41c2
+Create Date: 2026-10-18 09:42:17.205331
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e61b2f7c4a93'
+down_revision = 'b83f0d6a41c2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    data_version = op.create_table('data_version',
+    sa.Column('name', sa.String(length=64), nullable=False),
+    sa.Column('value', sa.Integer(), server_default='0', nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(
+        data_version,
+        [{'name': 'categories', 'value': 0}, {'name': 'items', 'value': 0}],
+    )
+
+
+def downgrade():
+    op.drop_table('data_version')
@@ -0,0 +1,24 @@
+"""add category deleting
+
+Revision ID: f3a8c51d07b2
+Revises: e61b2f7c4a93
+Create Date: 2026-10-18 14:05:51.618204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8c51d07b2'
+down_revision = 'e61b2f7c4a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('category', sa.Column('deleting', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    op.drop_column('category', 'deleting')
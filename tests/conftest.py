@@ -8,6 +8,10 @@ from alembic.config import Config
 
 from main import app as _app
 from main import db
+from main.engines.autocomplete import category_name_follower, item_name_follower
+from main.engines.cache import clear_caches as _clear_caches
+from main.engines.search import search_follower
+from main.libs.log import queue_handler
 from main.libs.utils import generate_jwt_token
 from tests.helper import setup_db
 
@@ -59,6 +63,17 @@ def session(monkeypatch):
     connection.close()
 
 
+@pytest.fixture(scope="function", autouse=True)
+def clear_caches():
+    """Drops values cached from rows that an earlier test rolled back."""
+    yield
+
+    _clear_caches()
+    search_follower.reset()
+    category_name_follower.reset()
+    item_name_follower.reset()
+
+
 @pytest.fixture(scope="function", autouse=True)
 def client(app, session):
     return app.test_client()
@@ -68,3 +83,11 @@ def client(app, session):
 def successful_authentication(client):
     jwt_token = generate_jwt_token(user_id=1)
     return [("Authorization", f"Bearer {jwt_token}")]
+
+
+@pytest.fixture(scope="function")
+def log_records(monkeypatch):
+    """Records of ServiceLogger, as handed to the logging thread."""
+    records = []
+    monkeypatch.setattr(queue_handler, "enqueue", records.append)
+    return records
@@ -0,0 +1,76 @@
+from main import db
+from main.engines.autocomplete import (
+    category_name_follower,
+    category_name_index,
+    item_name_follower,
+    warm_name_indexes,
+)
+from main.models.category import CategoryModel
+from main.models.data_change import DataChangeModel
+from main.models.data_version import DataVersionModel
+from main.models.item import ItemModel
+
+
+def get_names(client, url, query, **params):
+    response = client.get(url, query_string={"q": query, **params})
+    return [match["name"] for match in response.json["items"]]
+
+
+class TestAutocomplete:
+    def test_autocomplete_categories(self, client):
+        names = get_names(client, "/categories/autocomplete", "CATE_1_1", limit=2)
+        assert names == ["cate_1_1", "cate_1_10"]
+
+    def test_autocomplete_follows_writes(self, client, successful_authentication):
+        get_names(client, "/items/autocomplete", "item")
+        client.post(
+            "/categories",
+            json={"name": "zebra"},
+            headers=successful_authentication,
+        )
+        category = client.get(
+            "/categories/autocomplete", query_string={"q": "zeb"}
+        ).json["items"][0]
+
+        client.post(
+            f"/categories/{category['id']}/items",
+            json={"name": "zebra_item", "description": "desc"},
+            headers=successful_authentication,
+        )
+        assert get_names(client, "/items/autocomplete", "zebra") == ["zebra_item"]
+
+        client.delete(
+            f"/categories/{category['id']}", headers=successful_authentication
+        )
+        assert get_names(client, "/items/autocomplete", "zebra") == []
+        assert get_names(client, "/categories/autocomplete", "zebra") == []
+
+    def test_autocomplete_follows_writes_of_other_processes(self, client):
+        get_names(client, "/items/autocomplete", "item")
+
+        # As another process would, without updating the indexes of this one
+        category = CategoryModel(name="zebra", user_id=1)
+        item = ItemModel(name="zebra_item", description="d", category_id=1)
+        db.session.add_all([category, item])
+        db.session.flush()
+        DataVersionModel.bump(DataVersionModel.CATEGORIES)
+        DataChangeModel.record(DataChangeModel.CATEGORY, [category.id])
+        CategoryModel.record_item_write(1, 1)
+        DataChangeModel.record(DataChangeModel.ITEM, [item.id], 1)
+        db.session.commit()
+
+        assert get_names(client, "/categories/autocomplete", "zebra") == ["zebra"]
+        assert get_names(client, "/items/autocomplete", "zebra") == ["zebra_item"]
+
+    def test_warm_name_indexes(self, app):
+        warm_name_indexes(app)
+
+        assert category_name_follower.watermark is not None
+        assert item_name_follower.watermark is not None
+        assert category_name_index.match("cate_1_1", limit=1)
+
+    def test_invalid_limit(self, client):
+        response = client.get(
+            "/items/autocomplete", query_string={"q": "item", "limit": 100}
+        )
+        assert response.status_code == 400
@@ -1,4 +1,16 @@
 import pytest
+from sqlalchemy import event
+
+from main import config, db
+from main.controllers import category as category_controller
+from main.controllers.category import deletion_jobs
+from main.models.category import CategoryModel
+from main.models.data_version import DataVersionModel
+from main.models.item import ItemModel
+from tests.helper import InlineExecutor
+
+# Written to a category after its deletion started
+LATE_ITEM = {"name": "late_item", "description": "desc"}
 
 
 class TestCategory:
@@ -26,11 +38,123 @@ class TestCategory:
         elif page == 2:
             assert numbers_of_categories_displayed == 10
 
+    @pytest.mark.parametrize("include_total, total", [("true", 30), ("false", None)])
+    def test_total_get_category_lists(self, client, include_total, total):
+        data = {"page": 1, "per_page": 20, "include_total": include_total}
+        response = client.get("/categories", query_string=data)
+        assert response.status_code == 200
+        assert response.json["total"] == total
+
+    # Cursor mode walks the 30 categories forward in pages of 20 and back again
+    def test_successful_cursor_pagination_get_category_lists(self, client):
+        first_page = client.get("/categories", query_string={"after": ""}).json
+        assert len(first_page["items"]) == 20
+        assert first_page["before"] is None
+        assert "total" not in first_page
+
+        second_page = client.get(
+            "/categories", query_string={"after": first_page["after"]}
+        ).json
+        assert len(second_page["items"]) == 10
+        assert second_page["after"] is None
+        assert second_page["items"][0]["id"] > first_page["items"][-1]["id"]
+
+        previous_page = client.get(
+            "/categories", query_string={"before": second_page["before"]}
+        ).json
+        assert previous_page["items"] == first_page["items"]
+        assert previous_page["before"] is None
+
     def test_successful_get_category(self, client):
         category_id = 1
         response = client.get(f"/categories/{category_id}")
         assert response.status_code == 200
 
+    @pytest.mark.parametrize(
+        "query_string, counts",
+        [
+            ({"page": 2}, 1),
+            ({"after": ""}, 0),
+            ({"page": 2, "include_total": "false"}, 0),
+        ],
+    )
+    def test_category_list_counts_only_for_a_total(self, client, query_string, counts):
+        statements = []
+
+        def record_statement(_, __, statement, *___):
+            statements.append(statement)
+
+        connection = db.session.connection()
+        event.listen(connection, "before_cursor_execute", record_statement)
+        response = client.get("/categories", query_string=query_string)
+        # Another page of the same version reuses the count
+        client.get("/categories", query_string={**query_string, "per_page": 5})
+        event.remove(connection, "before_cursor_execute", record_statement)
+
+        assert response.status_code == 200
+        assert sum("count(" in statement for statement in statements) == counts
+
+    def test_item_writes_keep_the_category_etag(
+        self, client, successful_authentication
+    ):
+        etag = client.get("/categories/1").headers["ETag"]
+
+        client.post(
+            "/categories/1/items",
+            json={"name": "etag_item", "description": "desc"},
+            headers=successful_authentication,
+        )
+
+        response = client.get("/categories/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+    def test_conditional_get_category(self, client):
+        response = client.get("/categories/1")
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+
+        response = client.get("/categories/1", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.data == b""
+
+        response = client.get(
+            "/categories/1", headers={"If-Modified-Since": last_modified}
+        )
+        assert response.status_code == 304
+
+        response = client.get("/categories/1", headers={"If-None-Match": '"stale"'})
+        assert response.status_code == 200
+
+    def test_conditional_get_category_lists_changes_with_categories(
+        self, client, successful_authentication
+    ):
+        etag = client.get("/categories").headers["ETag"]
+        assert (
+            client.get("/categories", headers={"If-None-Match": etag}).status_code
+            == 304
+        )
+
+        client.post(
+            "/categories",
+            json={"name": "New Category"},
+            headers=successful_authentication,
+        )
+        response = client.get("/categories", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
+    def test_category_lists_change_with_writes_of_other_processes(self, client):
+        etag = client.get("/categories").headers["ETag"]
+
+        # As another worker would, without touching the caches of this one
+        db.session.add(CategoryModel(name="Other Process", user_id=1))
+        DataVersionModel.bump(DataVersionModel.CATEGORIES)
+        db.session.commit()
+
+        response = client.get("/categories", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json["total"] == 31
+
     def test_successful_post_category(self, client, successful_authentication):
         data = {"name": "New Category"}
         post_response = client.post(
@@ -55,6 +179,91 @@ class TestCategory:
         assert get_category_failed_response.status_code == 404
         assert get_item_list_failed_response.status_code == 404
 
+    def test_successful_chunked_delete_category(
+        self, client, successful_authentication, monkeypatch
+    ):
+        monkeypatch.setattr(config, "CATEGORY_DELETE_CHUNK_SIZE", 7)
+
+        delete_response = client.delete(
+            "/categories/1", headers=successful_authentication
+        )
+        assert delete_response.status_code == 200
+        assert client.get("/categories/1").status_code == 404
+
+    def test_successful_background_delete_category(
+        self, client, successful_authentication, monkeypatch
+    ):
+        monkeypatch.setattr(config, "CATEGORY_ASYNC_DELETE_THRESHOLD", 10)
+        monkeypatch.setattr(deletion_jobs, "executor", InlineExecutor())
+        assert client.get("/categories/1/deletion").status_code == 404
+
+        delete_response = client.delete(
+            "/categories/1", headers=successful_authentication
+        )
+        assert delete_response.status_code == 202
+        assert delete_response.json == {"status": "running"}
+
+        status_response = client.get("/categories/1/deletion")
+        assert status_response.json == {"status": "done"}
+        assert client.get("/categories/1").status_code == 404
+
+    def test_background_delete_started_by_another_process(
+        self, client, successful_authentication, monkeypatch
+    ):
+        monkeypatch.setattr(config, "CATEGORY_ASYNC_DELETE_THRESHOLD", 10)
+        monkeypatch.setattr(deletion_jobs, "executor", InlineExecutor())
+        CategoryModel.start_deletion(1)
+        # Part of the items were deleted by the other process
+        ItemModel.query.filter(ItemModel.id <= 10).delete()
+
+        assert client.get("/categories/1/deletion").json == {"status": "running"}
+        delete_response = client.delete(
+            "/categories/1", headers=successful_authentication
+        )
+        assert delete_response.json == {"status": "running"}
+        assert client.get("/categories/1/deletion").json == {"status": "done"}
+
+    def test_failed_background_delete_category(
+        self, client, successful_authentication, monkeypatch, log_records
+    ):
+        def fail(category_id):
+            raise RuntimeError("Lost connection")
+
+        monkeypatch.setattr(config, "CATEGORY_ASYNC_DELETE_THRESHOLD", 10)
+        monkeypatch.setattr(deletion_jobs, "executor", InlineExecutor())
+        monkeypatch.setattr(category_controller, "_delete_items_and_category", fail)
+
+        delete_response = client.delete(
+            "/categories/1", headers=successful_authentication
+        )
+        assert delete_response.status_code == 202
+
+        assert [record.getMessage() for record in log_records] == ["Lost connection"]
+        assert client.get("/categories/1/deletion").status_code == 404
+        assert CategoryModel.query.get(1).deleting is False
+
+    @pytest.mark.parametrize(
+        "method, path, body",
+        [
+            ("post", "/categories/1/items", LATE_ITEM),
+            ("post", "/categories/1/items:batch", [LATE_ITEM]),
+            ("put", "/categories/1/items/1", LATE_ITEM),
+            ("delete", "/categories/1/items/1", None),
+        ],
+    )
+    def test_item_writes_fail_once_a_deletion_started(
+        self, client, successful_authentication, method, path, body
+    ):
+        CategoryModel.start_deletion(1)
+
+        response = client.open(
+            path, method=method, json=body, headers=successful_authentication
+        )
+
+        assert response.status_code == 404
+        assert CategoryModel.query.get(1).item_count == 30
+        assert ItemModel.query.filter_by(category_id=1).count() == 30
+
     # -----------------------FAILED TEST CASE-------------
 
     @pytest.mark.parametrize(
@@ -88,6 +297,18 @@ class TestCategory:
         assert response.status_code == 200
         assert response.json["items"] == []
 
+    @pytest.mark.parametrize(
+        "data",
+        [
+            {"after": "not-a-cursor"},  # Undecodable token
+            {"after": "ImEi"},  # Decodes to a string instead of an id
+            {"after": "", "before": ""},  # Both directions at once
+        ],
+    )
+    def test_invalid_cursor_category_lists(self, client, data):
+        response = client.get("/categories", query_string=data)
+        assert response.status_code == 400
+
     def test_query_page_over_20_category_lists(self, client):
         data = {"page": 1, "per_page": 100}
         response = client.get("/categories", query_string=data)
@@ -131,6 +352,10 @@ class TestCategory:
         )
         assert delete_response.status_code == 404
 
+    def test_not_found_category_deletion(self, client):
+        response = client.get("/categories/2/deletion")
+        assert response.status_code == 404
+
     # In database, category_id 11 belongs to user_id 2
     # While successful_authentication returns JWT token of user_id 1
     # So a Forbidden (403) error should be raised
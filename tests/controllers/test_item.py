@@ -1,10 +1,18 @@
+import gzip
+import json
+
 import pytest
+from sqlalchemy import event
 
 from main import db
+from main.engines.cache import lookup_cache
+from main.engines.search import search_follower
 from main.libs.utils import generate_jwt_token
 from main.models.category import CategoryModel
+from main.models.data_change import DataChangeModel
 from main.models.item import ItemModel
 from main.models.user import UserModel
+from tests.helper import InlineExecutor
 
 
 def create_user(email="a@gmail.com", password="Abc123"):
@@ -24,6 +32,9 @@ def create_category(name="new_cate", user_id=1):
 def create_item(name="new_item", description="new_desc", category_id=1):
     item = ItemModel(name=name, description=description, category_id=category_id)
     db.session.add(item)
+    db.session.flush()
+    CategoryModel.record_item_write(category_id, 1)
+    DataChangeModel.record(DataChangeModel.ITEM, [item.id], category_id)
     db.session.commit()
     return item
 
@@ -56,6 +67,63 @@ class TestGetItem:
         elif page == 2:
             assert numbers_of_items_displayed == 0
 
+    def test_successful_cursor_pagination_get_item_lists(self, client):
+        self._set_up()
+        next_item = create_item(name="next_item", category_id=self.category.id)
+
+        first_page = client.get(
+            f"/categories/{self.category.id}/items",
+            query_string={"after": "", "per_page": 1},
+        ).json
+        assert [item["id"] for item in first_page["items"]] == [self.item.id]
+
+        second_page = client.get(
+            f"/categories/{self.category.id}/items",
+            query_string={"after": first_page["after"], "per_page": 1},
+        ).json
+        assert [item["id"] for item in second_page["items"]] == [next_item.id]
+        assert second_page["after"] is None
+
+    def test_sort_and_filter_item_lists(self, client):
+        self._set_up()
+        create_item(name="b_item", category_id=self.category.id)
+        create_item(name="a_item", category_id=self.category.id)
+        create_item(name="a%item", category_id=self.category.id)
+        url = f"/categories/{self.category.id}/items"
+
+        response = client.get(url, query_string={"sort": "-name"})
+        assert [item["name"] for item in response.json["items"]] == [
+            "new_item",
+            "b_item",
+            "a_item",
+            "a%item",
+        ]
+
+        response = client.get(url, query_string={"sort": "name", "name_prefix": "a_"})
+        assert [item["name"] for item in response.json["items"]] == ["a_item"]
+        assert response.json["total"] == 1
+
+        response = client.get(url, query_string={"updated_since": "2999-01-01T00:00"})
+        assert response.json["items"] == []
+        assert response.json["total"] == 0
+
+    @pytest.mark.parametrize(
+        "query_string",
+        [
+            {"sort": "description"},
+            {"sort": "updated_time"},
+            {"sort": "name", "after": ""},
+            {"updated_since": "yesterday"},
+        ],
+    )
+    def test_invalid_sort_and_filter_item_lists(self, client, query_string):
+        self._set_up()
+
+        response = client.get(
+            f"/categories/{self.category.id}/items", query_string=query_string
+        )
+        assert response.status_code == 400
+
     # Item with item_id 1 belongs to category_id 1
     def test_successful_get_one_item(self, client):
         self._set_up()
@@ -65,6 +133,95 @@ class TestGetItem:
         )
         assert response.status_code == 200
 
+    def test_conditional_get_item_lists_changes_with_items(self, client):
+        self._set_up()
+        url = f"/categories/{self.category.id}/items"
+        etag = client.get(url).headers["ETag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        # A different page has its own ETag
+        response = client.get(
+            url, query_string={"per_page": 5}, headers={"If-None-Match": etag}
+        )
+        assert response.status_code == 200
+
+        client.post(
+            url,
+            json={"name": "other_item", "description": "other_desc"},
+            headers=[("Authorization", f"Bearer {generate_jwt_token(self.user.id)}")],
+        )
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert len(response.json["items"]) == 2
+
+    def test_item_lists_change_with_writes_of_other_processes(self, client):
+        self._set_up()
+        url = f"/categories/{self.category.id}/items"
+        etag = client.get(url).headers["ETag"]
+
+        # As another worker would, while this one has the category cached
+        db.session.add(
+            ItemModel(name="other", description="other", category_id=self.category.id)
+        )
+        CategoryModel.record_item_write(self.category.id, 1)
+        db.session.commit()
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json["total"] == 2
+
+    def test_get_one_item_looks_up_category_and_item_together(self, client):
+        self._set_up()
+        url = f"/categories/{self.category.id}/items/{self.item.id}"
+        lookup_cache.clear()
+        statements = []
+
+        def count_statement(*_):
+            statements.append(1)
+
+        connection = db.session.connection()
+        event.listen(connection, "before_cursor_execute", count_statement)
+        response = client.get(url)
+        event.remove(connection, "before_cursor_execute", count_statement)
+
+        assert response.status_code == 200
+        # The joined lookup, then the items_version of the category
+        assert len(statements) == 2
+
+    def test_get_one_item_follows_writes_of_other_processes(self, client):
+        self._set_up()
+        url = f"/categories/{self.category.id}/items/{self.item.id}"
+        etag = client.get(url).headers["ETag"]
+
+        # As another worker would, while this one has the item cached
+        ItemModel.query.filter_by(id=self.item.id).update({"name": "renamed"})
+        CategoryModel.record_item_write(self.category.id)
+        db.session.commit()
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json["name"] == "renamed"
+        etag = response.headers["ETag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        ItemModel.query.filter_by(id=self.item.id).delete()
+        CategoryModel.record_item_write(self.category.id, -1)
+        db.session.commit()
+        assert client.get(url).status_code == 404
+
+    def test_get_one_item_reads_through_cache(self, client):
+        self._set_up()
+        url = f"/categories/{self.category.id}/items/{self.item.id}"
+
+        client.get(url)
+        hits = lookup_cache.hits
+        response = client.get(url)
+
+        assert response.status_code == 200
+        assert response.json["name"] == self.item.name
+        # Both the category and the item come from the cache
+        assert lookup_cache.hits == hits + 2
+
     @pytest.mark.parametrize(
         "page, per_page",
         [
@@ -121,6 +278,141 @@ class TestGetItem:
         assert response.status_code == 404
 
 
+class TestExportItems:
+    def _set_up(self):
+        self.user = create_user()
+        self.category = create_category(user_id=self.user.id)
+        self.items = [
+            create_item(name=f"item_{i}", category_id=self.category.id)
+            for i in range(3)
+        ]
+
+    def test_streams_every_item(self, client, monkeypatch):
+        self._set_up()
+        # Several chunks, the last one partial
+        monkeypatch.setattr("main.controllers.item.config.ITEM_EXPORT_BATCH_SIZE", 2)
+
+        response = client.get(f"/categories/{self.category.id}/items/export")
+
+        assert response.status_code == 200
+        assert response.mimetype == "application/x-ndjson"
+        assert response.is_streamed
+        lines = response.get_data().decode().splitlines()
+        assert [json.loads(line)["name"] for line in lines] == [
+            "item_0",
+            "item_1",
+            "item_2",
+        ]
+
+    def test_gzip(self, client):
+        self._set_up()
+
+        response = client.get(
+            f"/categories/{self.category.id}/items/export",
+            headers={"Accept-Encoding": "gzip, deflate"},
+        )
+
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert response.headers["Vary"] == "Accept-Encoding"
+        lines = gzip.decompress(response.get_data()).splitlines()
+        assert len(lines) == 3
+
+    def test_missing_category(self, client):
+        response = client.get("/categories/91/items/export")
+        assert response.status_code == 404
+
+
+class TestSearchItems:
+    def _set_up(self):
+        self.user = create_user()
+        self.category = create_category(user_id=self.user.id)
+        self.item = create_item(
+            name="searched_item",
+            description="Quick brown fox",
+            category_id=self.category.id,
+        )
+        self.authentication = [
+            ("Authorization", f"Bearer {generate_jwt_token(self.user.id)}")
+        ]
+
+    @staticmethod
+    def _count_results(client, query):
+        return client.get("/items/search", query_string={"q": query}).json["total"]
+
+    def test_search(self, client):
+        self._set_up()
+
+        response = client.get("/items/search", query_string={"q": "brown FOX"})
+
+        assert response.status_code == 200
+        assert response.json["total"] == 1
+        assert response.json["items"] == [
+            {
+                "id": self.item.id,
+                "name": "searched_item",
+                "description": "Quick brown fox",
+                "category_id": self.category.id,
+            }
+        ]
+
+    def test_index_follows_item_writes(self, client):
+        self._set_up()
+        client.get("/items/search", query_string={"q": "fox"})
+        url = f"/categories/{self.category.id}/items"
+
+        client.post(
+            url,
+            json={"name": "other_item", "description": "Lazy dog"},
+            headers=self.authentication,
+        )
+        assert self._count_results(client, "dog") == 1
+
+        client.put(
+            f"{url}/{self.item.id}",
+            json={"name": "searched_item_2", "description": "Slow dog"},
+            headers=self.authentication,
+        )
+        assert self._count_results(client, "dog") == 2
+        assert self._count_results(client, "fox") == 0
+
+        client.delete(f"{url}/{self.item.id}", headers=self.authentication)
+        assert self._count_results(client, "dog") == 1
+
+    def test_cli_reindex(self, app, client, monkeypatch):
+        monkeypatch.setattr(search_follower, "executor", InlineExecutor())
+        self._set_up()
+        client.get("/items/search", query_string={"q": "fox"})
+        ItemModel.query.filter_by(id=self.item.id).update({"description": "Dog"})
+
+        result = app.test_cli_runner().invoke(args=["items", "reindex"])
+
+        assert result.exit_code == 0
+        response = client.get("/items/search", query_string={"q": "dog"})
+        assert response.json["total"] == 1
+
+    def test_index_follows_item_writes_of_other_processes(self, client):
+        self._set_up()
+        client.get("/items/search", query_string={"q": "fox"})
+
+        # As another process would, without updating the index of this one
+        ItemModel.query.filter_by(id=self.item.id).update({"description": "Dog"})
+        CategoryModel.record_item_write(self.category.id)
+        DataChangeModel.record(DataChangeModel.ITEM, [self.item.id], self.category.id)
+        db.session.commit()
+
+        assert self._count_results(client, "dog") == 1
+        assert self._count_results(client, "fox") == 0
+
+    def test_missing_query(self, client):
+        response = client.get("/items/search")
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("cursor", ["after", "before"])
+    def test_cursors_are_rejected(self, client, cursor):
+        response = client.get("/items/search", query_string={"q": "fox", cursor: ""})
+        assert response.status_code == 400
+
+
 class TestPostItem:
     def _set_up(self):
         self.user = create_user()
@@ -183,6 +475,26 @@ class TestPostItem:
         )
         assert post_response.status_code == 400
 
+    # The per-category counter backs the `total` of the item list
+    def test_post_item_updates_item_list_total(self, client):
+        self._set_up()
+        create_item(category_id=self.category.id)
+
+        successful_authentication = [
+            ("Authorization", f"Bearer {generate_jwt_token(self.user.id)}")
+        ]
+        client.post(
+            f"/categories/{self.category.id}/items",
+            json={"name": self.item.name, "description": self.item.description},
+            headers=successful_authentication,
+        )
+
+        response = client.get(
+            f"/categories/{self.category.id}/items",
+            query_string={"page": 2, "per_page": 1},
+        )
+        assert response.json["total"] == 2
+
     # Lacking access_token
     def test_unauthorized_post_item(self, client):
         self._set_up()
@@ -233,6 +545,189 @@ class TestPostItem:
         assert post_response.status_code == 404
 
 
+class TestPostItemBatch:
+    def _set_up(self):
+        self.user = create_user()
+        self.category = create_category(user_id=self.user.id)
+        self.authentication = [
+            ("Authorization", f"Bearer {generate_jwt_token(self.user.id)}")
+        ]
+
+    def test_successful_post_item_batch(self, client):
+        self._set_up()
+        data = [
+            {"name": f"batch_item_{i}", "description": f"batch_desc_{i}"}
+            for i in range(3)
+        ]
+
+        post_response = client.post(
+            f"/categories/{self.category.id}/items:batch",
+            json=data,
+            headers=self.authentication,
+        )
+        assert post_response.status_code == 200
+
+        response = client.get(f"/categories/{self.category.id}/items")
+        assert [item["name"] for item in response.json["items"]] == [
+            item["name"] for item in data
+        ]
+        assert response.json["total"] == 3
+
+    @pytest.mark.parametrize(
+        "data, error_data",
+        [
+            (
+                [
+                    {"name": "batch_item", "description": "desc"},
+                    {"name": "item_1_1", "description": "desc"},
+                ],
+                {"1": {"name": ["Item already exists"]}},
+            ),  # Item name already exists in the db
+            (
+                [
+                    {"name": "batch_item", "description": "desc"},
+                    {"name": "batch_item", "description": "desc"},
+                ],
+                {"1": {"name": ["Item already exists"]}},
+            ),  # Item name repeated in the batch
+            (
+                [
+                    {"name": "batch_item", "description": "desc"},
+                    {"name": ""},
+                ],
+                {
+                    "1": {
+                        "name": ["Fields cannot be blank"],
+                        "description": ["Missing data for required field."],
+                    }
+                },
+            ),  # Invalid second item
+            ([], None),  # Empty batch
+            (
+                {"name": "batch_item", "description": "desc"},
+                {
+                    "0": {"_schema": ["Invalid input type."]},
+                    "1": {"_schema": ["Invalid input type."]},
+                },
+            ),  # A single item instead of a list
+        ],
+    )
+    def test_invalid_post_item_batch(self, client, data, error_data):
+        self._set_up()
+
+        post_response = client.post(
+            f"/categories/{self.category.id}/items:batch",
+            json=data,
+            headers=self.authentication,
+        )
+        assert post_response.status_code == 400
+        assert post_response.json["error_data"] == error_data
+
+        response = client.get(f"/categories/{self.category.id}/items")
+        assert response.json["items"] == []
+
+    # category_id 2 belongs to user_id 2
+    def test_forbidden_post_item_batch(self, client):
+        self._set_up()
+
+        post_response = client.post(
+            "/categories/2/items:batch",
+            json=[{"name": "batch_item", "description": "desc"}],
+            headers=self.authentication,
+        )
+        assert post_response.status_code == 403
+
+
+class TestImportItems:
+    def _set_up(self):
+        self.user = create_user()
+        self.category = create_category(user_id=self.user.id)
+        self.authentication = [
+            ("Authorization", f"Bearer {generate_jwt_token(self.user.id)}")
+        ]
+
+    def test_import_ndjson(self, client, monkeypatch):
+        self._set_up()
+        monkeypatch.setattr("main.engines.importer.config.ITEM_IMPORT_CHUNK_SIZE", 2)
+        lines = [
+            '{"name": "import_1", "description": "desc"}',
+            "not json",
+            '{"name": "item_1_1", "description": "desc"}',
+            "",
+            '{"name": "import_2", "description": "desc"}',
+            '{"name": "import_2", "description": "desc"}',
+            '{"name": "import_3"}',
+        ]
+
+        response = client.post(
+            f"/categories/{self.category.id}/items:import",
+            data="\n".join(lines),
+            content_type="application/x-ndjson",
+            headers=self.authentication,
+        )
+
+        assert response.status_code == 200
+        assert response.json["imported"] == 2
+        assert response.json["rejected"] == 4
+        rejected_lines = [error["line"] for error in response.json["errors"]]
+        assert sorted(rejected_lines) == [2, 3, 6, 7]
+
+        items = client.get(f"/categories/{self.category.id}/items").json
+        assert [item["name"] for item in items["items"]] == ["import_1", "import_2"]
+        assert items["total"] == 2
+
+    def test_import_csv(self, client):
+        self._set_up()
+        data = "name,description\nimport_1,desc_1\nimport_2,\n"
+
+        response = client.post(
+            f"/categories/{self.category.id}/items:import",
+            data=data,
+            content_type="text/csv",
+            headers=self.authentication,
+        )
+
+        assert response.json["imported"] == 1
+        assert response.json["errors"] == [
+            {"line": 3, "errors": {"description": ["Fields cannot be blank"]}}
+        ]
+
+    def test_invalid_format(self, client):
+        self._set_up()
+
+        response = client.post(
+            f"/categories/{self.category.id}/items:import?format=xml",
+            data="",
+            headers=self.authentication,
+        )
+        assert response.status_code == 400
+
+    def test_forbidden_import(self, client):
+        self._set_up()
+
+        response = client.post(
+            "/categories/2/items:import",
+            data="",
+            headers=self.authentication,
+        )
+        assert response.status_code == 403
+
+    def test_cli_import(self, app, tmp_path):
+        self._set_up()
+        category_id = self.category.id
+        path = tmp_path / "items.ndjson"
+        path.write_text('{"name": "import_1", "description": "desc"}\n')
+
+        result = app.test_cli_runner().invoke(
+            args=["items", "import", str(category_id), str(path)]
+        )
+
+        assert result.exit_code == 0
+        assert "Imported 1 items, rejected 0" in result.output
+        item = ItemModel.query.filter_by(name="import_1").one()
+        assert item.category_id == category_id
+
+
 class TestPutItem:
     def _set_up(self):
         self.user = create_user()
@@ -259,6 +754,37 @@ class TestPutItem:
 
         assert post_response.status_code == 200
 
+    def test_put_item_invalidates_cached_item(self, client):
+        self._set_up()
+        successful_authentication = [
+            ("Authorization", f"Bearer {generate_jwt_token(self.user.id)}")
+        ]
+        url = f"/categories/{self.category.id}/items/{self.item.id}"
+        client.get(url)
+
+        client.put(
+            url, json={"name": "updated__item"}, headers=successful_authentication
+        )
+
+        assert client.get(url).json["name"] == "updated__item"
+
+    def test_put_item_changes_etag(self, client):
+        self._set_up()
+        successful_authentication = [
+            ("Authorization", f"Bearer {generate_jwt_token(self.user.id)}")
+        ]
+        url = f"/categories/{self.category.id}/items/{self.item.id}"
+        etag = client.get(url).headers["ETag"]
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        client.put(
+            url, json={"name": "updated__item"}, headers=successful_authentication
+        )
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json["name"] == "updated__item"
+
     @pytest.mark.parametrize(
         "data",
         [
@@ -362,6 +888,24 @@ class TestDeleteItem:
 
         assert delete_response.status_code == 200
 
+    def test_delete_item_updates_item_list_total(self, client):
+        self._set_up()
+        successful_authentication = [
+            ("Authorization", f"Bearer {generate_jwt_token(self.user.id)}")
+        ]
+        create_item(name="other_item", category_id=self.category.id)
+
+        client.delete(
+            f"/categories/{self.category.id}" f"/items/{self.item.id}",
+            headers=successful_authentication,
+        )
+
+        response = client.get(
+            f"/categories/{self.category.id}/items",
+            query_string={"page": 2, "per_page": 1},
+        )
+        assert response.json["total"] == 1
+
     def test_unauthorized_delete_item(self, client):
         self._set_up()
 
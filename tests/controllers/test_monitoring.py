@@ -0,0 +1,44 @@
+from main import config
+
+
+class TestMonitoring:
+    def test_successful_get_cache_stats(self, client):
+        client.get("/categories/1")
+        client.get("/categories/1")
+
+        response = client.get("/monitoring/caches")
+        assert response.status_code == 200
+        assert response.json["lookup"]["hits"] >= 1
+        assert response.json["lookup"]["misses"] >= 1
+
+    def test_successful_get_pool_stats(self, client):
+        response = client.get("/monitoring/pool")
+        assert response.status_code == 200
+
+        stats = response.json
+        assert stats["size"] == 5
+        assert stats["checkouts"] >= 1
+        assert (
+            stats["wait_seconds"]["count"] == stats["wait_seconds"]["buckets"]["+Inf"]
+        )
+
+    def test_successful_get_metrics(self, client):
+        client.get("/categories/1/items")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.mimetype == "text/plain"
+
+        text = response.get_data(as_text=True)
+        labels = 'method="GET",route="/categories/<int:category_id>/items"'
+        assert f"http_request_duration_seconds_count{{{labels}}}" in text
+        assert f"http_request_sql_statements_count{{{labels}}}" in text
+        assert 'cache_hits_total{cache="lookup"}' in text
+        assert "db_pool_size 5" in text
+
+    def test_warn_about_too_many_statements(self, client, monkeypatch, log_records):
+        monkeypatch.setattr(config, "SQL_STATEMENT_WARNING_THRESHOLD", 0)
+        client.get("/categories/1")
+
+        messages = [record.getMessage() for record in log_records]
+        assert "Too many SQL statements in one request, N+1 queries?" in messages
@@ -1,5 +1,9 @@
 import pytest
 
+from main import db
+from main.libs.utils import LegacySha512Hasher
+from main.models.user import UserModel
+
 
 class TestUser:
     def test_successful_sign_up(self, client):
@@ -50,3 +54,28 @@ class TestUser:
         data = {"email": email, "password": password}
         response = client.post("/users/auth", json=data)
         assert response.status_code == 400
+
+    # Users stored with the old SHA-512 hash are upgraded on their next login
+    def test_successful_auth_upgrades_legacy_hash(self, client):
+        user = UserModel.query.filter_by(email="b@gmail.com").one()
+        user.hashed_password = LegacySha512Hasher().hash("Def456", user.salt)
+        db.session.commit()
+
+        data = {"email": "b@gmail.com", "password": "Def456"}
+        response = client.post("/users/auth", json=data)
+        assert response.status_code == 200
+        assert user.hashed_password.startswith("scrypt$")
+
+        response = client.post("/users/auth", json=data)
+        assert response.status_code == 200
+
+    def test_invalid_auth_keeps_legacy_hash(self, client):
+        user = UserModel.query.filter_by(email="b@gmail.com").one()
+        legacy_hash = LegacySha512Hasher().hash("Def456", user.salt)
+        user.hashed_password = legacy_hash
+        db.session.commit()
+
+        data = {"email": "b@gmail.com", "password": "Wrong456"}
+        response = client.post("/users/auth", json=data)
+        assert response.status_code == 400
+        assert user.hashed_password == legacy_hash
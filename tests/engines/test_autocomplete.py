@@ -0,0 +1,57 @@
+from main.engines.autocomplete import NameMatch, PrefixIndex
+
+
+def make_index():
+    index = PrefixIndex()
+    index.build(
+        [(1, "Apple", 1), (2, "apricot", 1), (3, "Banana", 2), (4, "APPLE pie", 2)]
+    )
+    return index
+
+
+class TestPrefixIndex:
+    def test_match_ignores_case(self):
+        assert make_index().match("ap", limit=10) == [
+            NameMatch(1, "Apple"),
+            NameMatch(4, "APPLE pie"),
+            NameMatch(2, "apricot"),
+        ]
+
+    def test_match_limit(self):
+        index = make_index()
+
+        assert index.match("APP", limit=1) == [NameMatch(1, "Apple")]
+        assert index.match("c", limit=10) == []
+
+    def test_add_replaces_and_remove(self):
+        index = make_index()
+        index.add(1, "Cherry", 1)
+
+        assert index.match("apple", limit=10) == [NameMatch(4, "APPLE pie")]
+        assert index.match("ch", limit=10) == [NameMatch(1, "Cherry")]
+
+        index.remove(1)
+        index.remove_group(2)
+        assert index.match("", limit=10) == [NameMatch(2, "apricot")]
+
+    def test_add_many_replaces_and_merges(self):
+        index = make_index()
+        index.add_many([(5, "apex", 1), (1, "Cherry", 1), (6, "Aardvark", 2)])
+
+        assert index.match("a", limit=10) == [
+            NameMatch(6, "Aardvark"),
+            NameMatch(5, "apex"),
+            NameMatch(4, "APPLE pie"),
+            NameMatch(2, "apricot"),
+        ]
+        assert index.match("ch", limit=10) == [NameMatch(1, "Cherry")]
+
+        index.remove_group(1)
+        assert index.match("", limit=10) == [
+            NameMatch(6, "Aardvark"),
+            NameMatch(4, "APPLE pie"),
+            NameMatch(3, "Banana"),
+        ]
+
+        index.remove_group(2, 3)
+        assert index.match("", limit=10) == []
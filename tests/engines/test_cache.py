@@ -0,0 +1,116 @@
+import fnmatch
+from concurrent.futures import ThreadPoolExecutor
+from threading import Barrier
+
+from main.engines.cache import LRUCache, RedisCache
+
+
+class FakeRedis:
+    """Local stand-in for redis.Redis, ignoring expiry"""
+
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.values:
+            return None
+        self.values[key] = value
+        return True
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+
+    def scan_iter(self, match):
+        return [key for key in self.values if fnmatch.fnmatch(key, match)]
+
+
+class TestLRUCache:
+    def test_hit_and_miss(self):
+        cache = LRUCache(ttl=60, max_size=10)
+        cache.set("a", {"id": 1})
+
+        assert cache.get("a") == {"id": 1}
+        assert cache.get("b") is None
+        assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(ttl=60, max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+
+    def test_expired_value_is_a_miss(self, monkeypatch):
+        cache = LRUCache(ttl=60, max_size=10)
+        cache.set("a", 1)
+
+        monkeypatch.setattr("main.engines.cache.time.monotonic", lambda: 10**9)
+        assert cache.get("a") is None
+
+    def test_delete(self):
+        cache = LRUCache(ttl=60, max_size=10)
+        cache.set("a", 1)
+        cache.delete("a", "missing")
+
+        assert cache.get("a") is None
+
+    def test_add_only_sets_missing_keys(self, monkeypatch):
+        cache = LRUCache(ttl=60, max_size=10)
+
+        assert cache.add("a", 1) is True
+        assert cache.add("a", 2) is False
+        assert cache.get("a") == 1
+
+        monkeypatch.setattr("main.engines.cache.time.monotonic", lambda: 10**9)
+        assert cache.add("a", 3) is True
+
+    def test_add_has_a_single_winner(self):
+        threads = 16
+        for _ in range(50):
+            cache = LRUCache(ttl=60, max_size=10)
+            barrier = Barrier(threads)
+
+            def add(value):
+                barrier.wait()
+                return cache.add("lock", value)
+
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                results = list(executor.map(add, range(threads)))
+            assert results.count(True) == 1
+
+
+class TestRedisCache:
+    def test_round_trip_is_namespaced(self):
+        client = FakeRedis()
+        cache = RedisCache(ttl=60, client=client, namespace="lookup")
+        cache.set("item:1", {"id": 1, "name": "item"})
+
+        assert list(client.values) == ["lookup:item:1"]
+        assert cache.get("item:1") == {"id": 1, "name": "item"}
+
+    def test_clear_only_drops_own_namespace(self):
+        client = FakeRedis()
+        lookup = RedisCache(ttl=60, client=client, namespace="lookup")
+        count = RedisCache(ttl=60, client=client, namespace="count")
+        lookup.set("item:1", 1)
+        count.set("categories", 30)
+
+        lookup.clear()
+
+        assert lookup.get("item:1") is None
+        assert count.get("categories") == 30
+
+    def test_add_only_sets_missing_keys(self):
+        cache = RedisCache(ttl=60, client=FakeRedis(), namespace="response")
+
+        assert cache.add("lock", 1) is True
+        assert cache.add("lock", 2) is False
+        assert cache.get("lock") == 1
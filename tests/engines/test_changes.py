@@ -0,0 +1,146 @@
+import pytest
+
+from main import config, db
+from main.engines.changes import ChangeFollower
+from main.models.data_change import DataChangeModel
+from tests.helper import InlineExecutor
+
+
+class RecordingIndex:
+    """Records the builds and the changes applied by a ChangeFollower"""
+
+    def __init__(self):
+        self.builds = 0
+        self.applied = []
+
+    def build(self, session):
+        self.builds += 1
+
+    def apply(self, session, row_ids, group_ids):
+        self.applied.append((row_ids, group_ids))
+
+    def clear(self):
+        self.builds = 0
+        self.applied = []
+
+
+@pytest.fixture
+def index():
+    return RecordingIndex()
+
+
+@pytest.fixture
+def follower(index):
+    follower = ChangeFollower(
+        DataChangeModel.ITEM, build=index.build, apply=index.apply, clear=index.clear
+    )
+    follower.executor = InlineExecutor()
+    return follower
+
+
+def log_change(id_, kind=DataChangeModel.ITEM, row_id=None, group_id=None):
+    db.session.add(
+        DataChangeModel(id=id_, kind=kind, row_id=row_id, group_id=group_id)
+    )
+    db.session.flush()
+
+
+class TestChangeFollower:
+    def test_builds_once_then_applies_the_changes(self, follower, index):
+        follower.sync()
+        follower.sync()
+        assert index.builds == 1
+        assert index.applied == []
+
+        log_change(1, row_id=5, group_id=1)
+        log_change(2, group_id=2)
+        log_change(3, kind=DataChangeModel.CATEGORY, row_id=7)
+        follower.sync()
+
+        assert index.builds == 1
+        assert index.applied == [({5}, {2})]
+        assert follower.watermark == 3
+
+    def test_applies_the_changes_committed_late(self, follower, index):
+        follower.sync()
+        log_change(3, row_id=5)
+        follower.sync()
+
+        # Ids 1 and 2 were allocated first but committed after id 3
+        log_change(1, row_id=6)
+        follower.sync()
+        log_change(2, row_id=7)
+        follower.sync()
+
+        assert index.applied == [({5}, set()), ({6}, set()), ({7}, set())]
+
+    def test_gives_up_on_the_changes_committed_too_late(
+        self, follower, index, monkeypatch
+    ):
+        monkeypatch.setattr(config, "CHANGE_GAP_TIMEOUT", 0)
+        follower.sync()
+        log_change(2, row_id=5)
+        follower.sync()
+
+        log_change(1, row_id=6)
+        follower.sync()
+
+        assert index.applied == [({5}, set())]
+
+    def test_reads_the_changes_in_batches(self, follower, index, monkeypatch):
+        monkeypatch.setattr(config, "CHANGE_BATCH_SIZE", 2)
+        follower.sync()
+        for id_ in range(1, 6):
+            log_change(id_, row_id=id_)
+
+        follower.sync()
+
+        assert index.applied == [({1, 2}, set()), ({3, 4}, set()), ({5}, set())]
+        assert follower.watermark == 5
+
+    def test_rebuilds_on_a_rebuild_change(self, follower, index):
+        follower.sync()
+        log_change(1)
+
+        follower.sync()
+
+        assert index.builds == 2
+        assert index.applied == []
+
+    def test_rebuilds_once_idle_for_longer_than_the_retention(
+        self, follower, index, monkeypatch
+    ):
+        follower.sync()
+        monkeypatch.setattr(config, "CHANGE_RETENTION", -1)
+
+        follower.sync()
+
+        assert index.builds == 2
+
+    def test_keeps_the_index_when_a_rebuild_fails(
+        self, follower, index, monkeypatch, log_records
+    ):
+        follower.sync()
+        log_change(1)
+
+        def fail(session):
+            raise RuntimeError("Lost connection")
+
+        monkeypatch.setattr(follower, "_build", fail)
+        follower.sync()
+
+        assert index.builds == 1
+        assert [record.getMessage() for record in log_records] == ["Lost connection"]
+
+        # The next catch up tries again
+        monkeypatch.setattr(follower, "_build", index.build)
+        follower.sync()
+        assert index.builds == 2
+
+    def test_reset(self, follower, index):
+        follower.sync()
+        follower.reset()
+
+        assert follower.watermark is None
+        follower.sync()
+        assert index.builds == 1
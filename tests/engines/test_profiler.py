@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import Counter
+
+import pytest
+
+from main import config
+from main.engines.profiler import (
+    PROFILE_HEADER,
+    PROFILE_ID_HEADER,
+    StackSampler,
+    is_valid_profile_token,
+    make_profile_token,
+    save_profile,
+)
+
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    monkeypatch.setattr(config, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(config, "PROFILING_SECRET_KEY", "secret")
+    monkeypatch.setattr(config, "PROFILING_DIRECTORY", str(tmp_path))
+    return tmp_path
+
+
+def busy_loop(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestStackSampler:
+    def test_collapsed_stacks(self):
+        sampler = StackSampler(threading.get_ident(), interval=0.001)
+        sampler.start()
+        busy_loop(0.05)
+        stacks = sampler.stop()
+
+        assert stacks
+        assert any(stack.split(";")[-1].startswith("busy_loop") for stack in stacks)
+
+
+class TestProfileToken:
+    def test_valid_token(self, profiling):
+        assert is_valid_profile_token(make_profile_token(60))
+
+    def test_expired_token(self, profiling):
+        assert not is_valid_profile_token(make_profile_token(-1))
+
+    def test_forged_token(self, profiling):
+        expires, _, _ = make_profile_token(60).partition(".")
+        assert not is_valid_profile_token(f"{expires}.{'0' * 64}")
+        assert not is_valid_profile_token("garbage")
+
+
+class TestSaveProfile:
+    def test_keep_the_latest_profiles(self, profiling, monkeypatch):
+        monkeypatch.setattr(config, "PROFILING_MAX_FILES", 2)
+        names = [save_profile(Counter({"a;b": i + 1}), "GET /") for i in range(3)]
+
+        assert sorted(path.name for path in profiling.iterdir()) == names[1:]
+        assert (profiling / names[2]).read_text() == "a;b 3\n"
+
+
+class TestProfiledRequest:
+    def test_profile_with_token(self, client, profiling):
+        response = client.get(
+            "/categories", headers={PROFILE_HEADER: make_profile_token(60)}
+        )
+        assert response.status_code == 200
+
+        profile_id = response.headers[PROFILE_ID_HEADER]
+        assert "-GET_categories-" in profile_id
+        assert (profiling / profile_id).exists()
+
+    def test_not_profiled_with_invalid_token(self, client, profiling, monkeypatch):
+        monkeypatch.setattr(config, "PROFILING_SAMPLE_RATE", 1)
+        response = client.get("/categories", headers={PROFILE_HEADER: "0.forged"})
+
+        assert PROFILE_ID_HEADER not in response.headers
+
+    def test_profile_sampled_requests(self, client, profiling, monkeypatch):
+        monkeypatch.setattr(config, "PROFILING_SAMPLE_RATE", 1)
+        response = client.get("/categories")
+
+        assert PROFILE_ID_HEADER in response.headers
+
+    def test_disabled(self, client, profiling, monkeypatch):
+        monkeypatch.setattr(config, "PROFILING_ENABLED", False)
+        response = client.get(
+            "/categories", headers={PROFILE_HEADER: make_profile_token(60)}
+        )
+
+        assert PROFILE_ID_HEADER not in response.headers
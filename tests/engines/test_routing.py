@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import Column, MetaData, String, Table, create_engine, exc, select
+
+from main import app, db
+from main.engines.routing import ReplicaSet, RoutingSession, reading_from_primary
+
+source = Table("source", MetaData(), Column("name", String(16)))
+
+
+@pytest.fixture
+def engines(tmp_path):
+    """A primary and a replica database, each naming itself in `source`"""
+    engines = {}
+    for name in ("primary", "replica"):
+        engine = create_engine(f"sqlite:///{tmp_path / name}.db")
+        source.create(engine)
+        with engine.begin() as connection:
+            connection.execute(source.insert(), {"name": name})
+        engines[name] = engine
+
+    # Connecting fails, the directory doesn't exist
+    engines["broken"] = create_engine(f"sqlite:///{tmp_path / 'missing' / 'x.db'}")
+    return engines
+
+
+def create_session(engines, *replica_names):
+    replicas = ReplicaSet([engines[name] for name in replica_names], ejection_time=30)
+    return RoutingSession(db, bind=engines["primary"], binds={}, replicas=replicas)
+
+
+def read_source(session):
+    return session.execute(select(source.c.name)).scalar()
+
+
+class TestRoutingSession:
+    def test_read_only_request_reads_from_replica(self, engines):
+        session = create_session(engines, "replica")
+        with app.test_request_context(method="GET"):
+            assert read_source(session) == "replica"
+
+    def test_write_request_reads_from_primary(self, engines):
+        session = create_session(engines, "replica")
+        with app.test_request_context(method="POST"):
+            assert read_source(session) == "primary"
+
+    def test_reads_after_a_write_stay_on_primary(self, engines):
+        session = create_session(engines, "replica")
+        with app.test_request_context(method="GET"):
+            session.execute(source.insert(), {"name": "written"})
+            assert read_source(session) == "primary"
+
+    def test_reading_from_primary(self, engines):
+        session = create_session(engines, "replica")
+        with app.test_request_context(method="GET"):
+            with reading_from_primary(session):
+                assert read_source(session) == "primary"
+                with reading_from_primary(session):
+                    assert read_source(session) == "primary"
+                assert read_source(session) == "primary"
+            assert read_source(session) == "replica"
+
+    def test_failing_replica_is_ejected(self, engines):
+        replicas = ReplicaSet([engines["broken"], engines["replica"]], ejection_time=30)
+
+        with app.test_request_context(method="GET"):
+            session = RoutingSession(
+                db, bind=engines["primary"], binds={}, replicas=replicas
+            )
+            with pytest.raises(exc.OperationalError):
+                read_source(session)
+
+            for _ in range(3):
+                session = RoutingSession(
+                    db, bind=engines["primary"], binds={}, replicas=replicas
+                )
+                assert read_source(session) == "replica"
+
+    def test_all_replicas_ejected_reads_from_primary(self, engines):
+        session = create_session(engines, "replica")
+        session.replicas.eject(engines["replica"])
+        with app.test_request_context(method="GET"):
+            assert read_source(session) == "primary"
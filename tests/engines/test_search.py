@@ -0,0 +1,51 @@
+from main.engines.search import InvertedIndex, SearchDocument
+
+
+def make_index():
+    index = InvertedIndex()
+    index.build(
+        [
+            SearchDocument(1, "Red apple", "A sweet fruit", 1),
+            SearchDocument(2, "Green pear", "Sweet, like a red apple", 1),
+            SearchDocument(3, "Blue car", "Fast", 2),
+        ]
+    )
+    return index
+
+
+class TestInvertedIndex:
+    def test_ranks_name_matches_first(self):
+        documents, total = make_index().search("apple", offset=0, limit=10)
+
+        assert [document.id for document in documents] == [1, 2]
+        assert total == 2
+
+    def test_matches_every_token(self):
+        index = make_index()
+
+        documents, _ = index.search("RED sweet", offset=0, limit=10)
+        assert {document.id for document in documents} == {1, 2}
+        assert index.search("apple car", offset=0, limit=10) == ([], 0)
+        assert index.search("missing", offset=0, limit=10) == ([], 0)
+        assert index.search("  ", offset=0, limit=10) == ([], 0)
+
+    def test_paginates(self):
+        documents, total = make_index().search("apple", offset=1, limit=1)
+
+        assert [document.id for document in documents] == [2]
+        assert total == 2
+
+    def test_add_replaces_and_remove(self):
+        index = make_index()
+        index.add(SearchDocument(1, "Yellow banana", "Soft", 1))
+        documents, _ = index.search("apple", offset=0, limit=10)
+        assert [document.id for document in documents] == [2]
+        assert index.search("banana", offset=0, limit=10)[1] == 1
+
+        index.remove(1)
+        index.remove_category(2)
+        assert index.search("banana", offset=0, limit=10) == ([], 0)
+        assert index.search("car", offset=0, limit=10) == ([], 0)
+
+        index.remove_category(1, 3)
+        assert index.search("pear", offset=0, limit=10) == ([], 0)
@@ -3,57 +3,84 @@ from main.models.category import CategoryModel
 from main.models.item import ItemModel
 from main.models.user import UserModel
 
+USER_CREDENTIALS = [
+    ("a@gmail.com", "Abc123"),
+    ("b@gmail.com", "Def456"),
+    ("c@gmail.com", "Xyz789"),
+]
 
-def setup_db():
-    setup_user()
-    setup_category()
-    setup_item()
 
+def setup_db(users=3, categories_per_user=10, item_categories=3, items_per_category=30):
+    """
+    The defaults seed the rows the tests expect. Larger counts seed a
+    database for the benchmarks, with the same names and ids for the first rows
 
-def setup_user():
-    users = [
-        UserModel(email="a@gmail.com", password="Abc123"),
-        UserModel(email="b@gmail.com", password="Def456"),
-        UserModel(email="c@gmail.com", password="Xyz789"),
-    ]
+    :param item_categories: <int> Number of categories, from id 1, having items
+    """
+    setup_user(users)
+    setup_category(users, categories_per_user)
+    setup_item(item_categories, items_per_category)
 
-    for user in users:
-        db.session.add(user)
 
+def setup_user(count=3):
+    users = [
+        UserModel(email=email, password=password)
+        for email, password in USER_CREDENTIALS[:count]
+    ]
+    db.session.add_all(users)
     db.session.commit()
 
+    # Hashing every password would take minutes, the other users share one
+    if count > len(users):
+        db.session.execute(
+            UserModel.__table__.insert(),
+            [
+                {
+                    "email": f"user_{i}@gmail.com",
+                    "salt": users[0].salt,
+                    "hashed_password": users[0].hashed_password,
+                }
+                for i in range(len(users) + 1, count + 1)
+            ],
+        )
+        db.session.commit()
 
-def setup_category():
-    categories_1 = [CategoryModel(name=f"cate_1_{i}", user_id=1) for i in range(1, 11)]
-    categories_2 = [CategoryModel(name=f"cate_2_{i}", user_id=2) for i in range(1, 11)]
-    categories_3 = [CategoryModel(name=f"cate_3_{i}", user_id=3) for i in range(1, 11)]
 
-    for cate1, cate2, cate3 in zip(categories_1, categories_2, categories_3):
-        db.session.add(cate1)
-        db.session.add(cate2)
-        db.session.add(cate3)
+def setup_category(users=3, per_user=10):
+    db.session.execute(
+        CategoryModel.__table__.insert(),
+        [
+            {"name": f"cate_{user_id}_{i}", "user_id": user_id}
+            for i in range(1, per_user + 1)
+            for user_id in range(1, users + 1)
+        ],
+    )
     db.session.commit()
 
 
-def setup_item():
-    items_1 = [
-        ItemModel(name=f"item_1_{i}", description=f"desc_1_{i}", category_id=1)
-        for i in range(1, 31)
-    ]
+def setup_item(categories=3, per_category=30):
+    db.session.execute(
+        ItemModel.__table__.insert(),
+        [
+            {
+                "name": f"item_{category_id}_{i}",
+                "description": f"desc_{category_id}_{i}",
+                "category_id": category_id,
+            }
+            for i in range(1, per_category + 1)
+            for category_id in range(1, categories + 1)
+        ],
+    )
 
-    items_2 = [
-        ItemModel(name=f"item_2_{i}", description=f"desc_2_{i}", category_id=2)
-        for i in range(1, 31)
-    ]
+    for category_id in range(1, categories + 1):
+        CategoryModel.record_item_write(category_id, per_category)
 
-    items_3 = [
-        ItemModel(name=f"item_3_{i}", description=f"desc_3_{i}", category_id=3)
-        for i in range(1, 31)
-    ]
+    db.session.commit()
 
-    for item1, item2, item3 in zip(items_1, items_2, items_3):
-        db.session.add(item1)
-        db.session.add(item2)
-        db.session.add(item3)
 
-    db.session.commit()
+class InlineExecutor:
+    """Runs the functions submitted to it right away, in the calling thread"""
+
+    @staticmethod
+    def submit(func, *args):
+        func(*args)
@@ -0,0 +1,88 @@
+import json
+import logging
+from queue import Queue
+
+from main.libs.log import (
+    JsonFormatter,
+    NonBlockingQueueHandler,
+    RateLimitFilter,
+    ServiceLogger,
+)
+
+
+def make_record(level=logging.WARNING, message="Category not found", **extra):
+    record = logging.LogRecord("test", level, __file__, 1, message, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class TestServiceLogger:
+    def test_data_is_kept_for_the_logging_thread(self, log_records):
+        data = {"error_code": 404}
+        ServiceLogger("tests.log.data").warning(message="Not found", data=data)
+
+        assert len(log_records) == 1
+        assert log_records[0].getMessage() == "Not found"
+        assert log_records[0].data is data
+
+    def test_skip_disabled_levels(self, log_records):
+        ServiceLogger("tests.log.disabled").debug(message="Hidden", data=object())
+
+        assert log_records == []
+
+    def test_exception_keeps_the_traceback(self, log_records):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            ServiceLogger("tests.log.exception").exception(message="boom")
+
+        record = log_records[0]
+        assert record.exc_info is None
+        assert "ValueError: boom" in record.exc_text
+
+
+class TestJsonFormatter:
+    def test_json_line(self):
+        record = make_record(data={"id": 1, "at": object()}, suppressed=2)
+
+        entry = json.loads(JsonFormatter().format(record))
+        assert entry["logger"] == "test"
+        assert entry["level"] == "WARNING"
+        assert entry["message"] == "Category not found"
+        assert entry["data"]["id"] == 1
+        assert entry["suppressed"] == 2
+        assert "dropped" not in entry
+
+
+class TestNonBlockingQueueHandler:
+    def test_drop_records_when_full(self):
+        handler = NonBlockingQueueHandler(Queue(maxsize=1))
+        for _ in range(3):
+            handler.handle(make_record())
+
+        assert handler.queue.get_nowait().dropped == 0
+        assert handler.dropped == 2
+
+        handler.handle(make_record())
+        assert handler.queue.get_nowait().dropped == 2
+
+
+class TestRateLimitFilter:
+    def test_limit_repeated_warnings(self, monkeypatch):
+        now = [0]
+        monkeypatch.setattr("main.libs.log.time.monotonic", lambda: now[0])
+        rate_limit = RateLimitFilter(limit=2, period=60)
+
+        assert [rate_limit.filter(make_record()) for _ in range(4)] == [
+            True,
+            True,
+            False,
+            False,
+        ]
+        assert rate_limit.filter(make_record(message="Item not found"))
+        assert rate_limit.filter(make_record(level=logging.ERROR))
+
+        now[0] = 60
+        record = make_record()
+        assert rate_limit.filter(record)
+        assert record.suppressed == 2
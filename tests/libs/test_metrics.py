@@ -0,0 +1,43 @@
+from main.libs.metrics import Histogram, HistogramFamily, format_histogram
+
+
+class TestHistogram:
+    def test_snapshot_is_cumulative(self):
+        histogram = Histogram(buckets=(0.1, 1))
+        for value in (0.05, 0.1, 0.5, 5):
+            histogram.observe(value)
+
+        assert histogram.snapshot() == {
+            "buckets": {"0.1": 2, "1": 3, "+Inf": 4},
+            "count": 4,
+            "sum": 5.65,
+        }
+
+
+class TestHistogramFamily:
+    def test_one_histogram_per_label_set(self):
+        family = HistogramFamily(buckets=(1,))
+        family.labels(route="/a").observe(0.5)
+        family.labels(route="/a").observe(2)
+        family.labels(route="/b").observe(0.5)
+
+        snapshots = dict(
+            (labels["route"], snapshot) for labels, snapshot in family.snapshots()
+        )
+        assert snapshots["/a"]["count"] == 2
+        assert snapshots["/b"]["count"] == 1
+
+
+class TestFormatHistogram:
+    def test_prometheus_text(self):
+        family = HistogramFamily(buckets=(1,))
+        family.labels(route='/"a"').observe(0.5)
+
+        assert format_histogram("latency", "Latency", family.snapshots()) == [
+            "# HELP latency Latency",
+            "# TYPE latency histogram",
+            'latency_bucket{route="/\\"a\\"",le="1"} 1',
+            'latency_bucket{route="/\\"a\\"",le="+Inf"} 1',
+            'latency_sum{route="/\\"a\\""} 0.5',
+            'latency_count{route="/\\"a\\""} 1',
+        ]
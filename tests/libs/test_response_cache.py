@@ -0,0 +1,62 @@
+from main.engines.cache import response_cache
+from main.libs.response_cache import (
+    cached_json_response,
+    make_response_key,
+)
+
+
+class Renderer:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+class TestCachedJsonResponse:
+    def test_rendered_once(self):
+        render = Renderer({"items": [1, 2]})
+
+        for _ in range(2):
+            response = cached_json_response("page", render)
+            assert response.mimetype == "application/json"
+            assert response.json == {"items": [1, 2]}
+        assert render.calls == 1
+
+    def test_expired_page_is_served_while_locked(self, monkeypatch):
+        cached_json_response("page", Renderer({"version": 1}))
+        monkeypatch.setattr("main.libs.response_cache.time.time", lambda: 10**10)
+        response_cache.add("page:lock", True)
+
+        render = Renderer({"version": 2})
+        assert cached_json_response("page", render).json == {"version": 1}
+        assert render.calls == 0
+
+    def test_expired_page_is_recomputed_by_one_request(self, monkeypatch):
+        cached_json_response("page", Renderer({"version": 1}))
+        monkeypatch.setattr("main.libs.response_cache.time.time", lambda: 10**10)
+
+        render = Renderer({"version": 2})
+        assert cached_json_response("page", render).json == {"version": 2}
+        assert render.calls == 1
+        assert response_cache.get("page:lock") is None
+
+    def test_missing_page_waits_for_the_lock(self, monkeypatch):
+        response_cache.add("page:lock", True)
+
+        def sleep(_):
+            response_cache.set("page", (b'{"version": 1}\n', 10**10))
+
+        monkeypatch.setattr("main.libs.response_cache.time.sleep", sleep)
+        render = Renderer({"version": 2})
+        assert cached_json_response("page", render).json == {"version": 1}
+        assert render.calls == 0
+
+
+class TestMakeResponseKey:
+    def test_key_ignores_argument_order(self):
+        assert make_response_key("items:1", 0, {"page": 1, "per_page": 5}) == (
+            make_response_key("items:1", 0, {"per_page": 5, "page": 1})
+        )
@@ -0,0 +1,27 @@
+from main.libs.sorting import get_order_by, get_sort_keys, get_sortable_columns
+from main.models.item import ItemModel
+
+
+class TestSorting:
+    def test_only_indexed_columns_are_sortable(self):
+        columns = get_sortable_columns(ItemModel.__table__, "category_id")
+
+        assert set(columns) == {"id", "name", "created_time"}
+        assert get_sort_keys(columns) == [
+            "-created_time",
+            "-id",
+            "-name",
+            "created_time",
+            "id",
+            "name",
+        ]
+
+    def test_order_by_ends_with_tiebreaker(self):
+        columns = get_sortable_columns(ItemModel.__table__, "category_id")
+
+        order_by = get_order_by("-created_time", columns, ItemModel.id)
+        assert [str(clause) for clause in order_by] == [
+            "item.created_time DESC",
+            "item.id DESC",
+        ]
+        assert len(get_order_by("id", columns, ItemModel.id)) == 1
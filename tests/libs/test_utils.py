@@ -0,0 +1,37 @@
+import time
+
+import jwt
+import pytest
+
+from main.commons.exceptions import InvalidAccessToken
+from main.libs.utils import decode_jwt_token, generate_jwt_token, verified_jwt_cache
+
+
+class TestDecodeJwtToken:
+    def test_verified_token_is_cached(self):
+        token = generate_jwt_token(user_id=1)
+
+        assert decode_jwt_token(token) == 1
+        hits = verified_jwt_cache.hits
+        assert decode_jwt_token(token) == 1
+        assert verified_jwt_cache.hits == hits + 1
+
+    def test_cached_token_expires_with_the_token(self, monkeypatch):
+        token = generate_jwt_token(user_id=1)
+        decode_jwt_token(token)
+        now = time.monotonic()
+        one_day = 24 * 60 * 60
+
+        monkeypatch.setattr(time, "monotonic", lambda: now + one_day - 60)
+        assert verified_jwt_cache.get(token) == 1
+
+        monkeypatch.setattr(time, "monotonic", lambda: now + one_day + 60)
+        assert verified_jwt_cache.get(token) is None
+
+    def test_invalid_token_is_not_cached(self):
+        token = jwt.encode({"sub": 1}, key="another key", algorithm="HS256")
+
+        for _ in range(2):
+            with pytest.raises(InvalidAccessToken):
+                decode_jwt_token(token)
+        assert verified_jwt_cache.get(token) is None
@@ -0,0 +1,113 @@
+import re
+from collections import namedtuple
+
+import pytest
+from sqlalchemy import text
+
+from main import db
+from main.models.category import CategoryModel
+from main.models.item import ItemModel
+from main.models.user import UserModel
+
+
+# Access of a plan row sorting the rows itself, without an index
+FILESORT = "FILESORT"
+
+# e.g. "SEARCH item USING INDEX ix_item_category_id_id (category_id=?)", "SCAN item"
+# or, before SQLite 3.36, "SCAN TABLE item"
+SQLITE_ACCESS_PATTERN = re.compile(
+    r"(?P<access>SCAN|SEARCH) (?:TABLE )?(?P<table>\w+)"
+    r"(?: USING (?:COVERING )?(?:INDEX (?P<index>\w+)|(?P<key>INTEGER PRIMARY KEY)))?"
+)
+
+PlanRow = namedtuple("PlanRow", "table access index")
+
+
+def explain(query):
+    """Return the plan of `query` as PlanRows"""
+    connection = db.session.connection()
+    dialect = connection.dialect
+    sql = query.statement.compile(
+        dialect=dialect, compile_kwargs={"literal_binds": True}
+    )
+
+    if dialect.name == "sqlite":
+        rows = connection.execute(text(f"EXPLAIN QUERY PLAN {sql}"))
+        return [_parse_sqlite_detail(row.detail) for row in rows]
+
+    plan = []
+    for row in connection.execute(text(f"EXPLAIN {sql}")).mappings():
+        plan.append(PlanRow(row["table"], row["type"], row["key"]))
+        if "Using filesort" in (row["Extra"] or ""):
+            plan.append(PlanRow(row["table"], FILESORT, None))
+    return plan
+
+
+def is_full_scan(plan_row):
+    """Whether the row reads a whole table, or sorts rows without an index"""
+    if plan_row.access == FILESORT:
+        return True
+    if plan_row.access == "SCAN":
+        # SQLite, "SCAN item USING INDEX ..." walks an index instead
+        return plan_row.index is None
+    if plan_row.access == "SEARCH":
+        return False
+    # MySQL
+    return plan_row.access == "ALL" or plan_row.index is None
+
+
+def _parse_sqlite_detail(detail):
+    if detail.startswith("USE TEMP B-TREE"):
+        # e.g. "USE TEMP B-TREE FOR ORDER BY"
+        return PlanRow(None, FILESORT, None)
+
+    match = SQLITE_ACCESS_PATTERN.match(detail)
+    if match is None:
+        return PlanRow(None, detail, None)
+    index = match["index"] or match["key"]
+    return PlanRow(match["table"], match["access"], index)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        UserModel.query.filter_by(email="a@gmail.com"),
+        CategoryModel.query.filter_by(user_id=1),
+        ItemModel.query.filter_by(category_id=1).order_by(ItemModel.id).limit(20),
+        ItemModel.query.filter(ItemModel.category_id == 1, ItemModel.id > 10)
+        .order_by(ItemModel.id)
+        .limit(20),
+        ItemModel.query.filter(
+            ItemModel.category_id == 1, ItemModel.name.startswith("item")
+        )
+        .order_by(ItemModel.name, ItemModel.id)
+        .limit(20),
+        ItemModel.query.filter_by(category_id=1)
+        .order_by(ItemModel.created_time.desc(), ItemModel.id.desc())
+        .limit(20),
+    ],
+    ids=[
+        "user_by_email",
+        "categories_by_user",
+        "item_list",
+        "item_keyset_seek",
+        "item_list_by_name_prefix",
+        "item_list_by_created_time",
+    ],
+)
+def test_hot_queries_use_an_index(query):
+    plan = explain(query)
+    assert plan
+    assert not any(is_full_scan(plan_row) for plan_row in plan), plan
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        ItemModel.query.filter_by(description="desc_1_1"),
+        ItemModel.query.filter_by(category_id=1).order_by(ItemModel.description),
+    ],
+    ids=["item_by_description", "item_list_by_description"],
+)
+def test_queries_without_an_index_are_detected(query):
+    assert any(is_full_scan(plan_row) for plan_row in explain(query))
@@ -0,0 +1,36 @@
+from marshmallow import fields, post_dump
+
+from main.models.item import ItemModel
+from main.schemas.base import BaseSchema
+from main.schemas.item import ItemSchema
+
+
+class TestDumpColumns:
+    def test_dumped_fields_only(self):
+        columns = ItemSchema(only=["id", "name"]).dump_columns(ItemModel)
+
+        assert columns == [ItemModel.id, ItemModel.name]
+
+
+class TestFastDump:
+    def test_matches_dump(self):
+        schema = ItemSchema()
+        item = ItemModel(id=1, name="item", description="desc", category_id=2)
+
+        assert schema.fast_dump(item) == schema.dump(item)
+        assert ItemSchema(only=["id"]).fast_dump(item) == {"id": 1}
+
+    def test_falls_back_to_dump(self):
+        class HookSchema(BaseSchema):
+            id = fields.Integer()
+
+            @post_dump
+            def add_kind(self, data, **__):
+                return {**data, "kind": "item"}
+
+        class DateSchema(BaseSchema):
+            created_time = fields.DateTime()
+
+        item = ItemModel(id=1)
+        assert HookSchema().fast_dump(item) == {"id": 1, "kind": "item"}
+        assert DateSchema().fast_dump(item) == {"created_time": None}
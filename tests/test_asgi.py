@@ -0,0 +1,139 @@
+import asyncio
+import json
+
+import pytest
+from flask import request
+
+from main.asgi import app, engine
+
+
+def call(path, query_string=b"", headers=()):
+    """Send one GET request to the ASGI app, return (status, headers, body)"""
+    messages = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": path,
+            "raw_path": path.encode(),
+            "root_path": "",
+            "query_string": query_string,
+            "headers": [(name.encode(), value.encode()) for name, value in headers],
+            "server": ("localhost", 80),
+            "client": ("127.0.0.1", 1234),
+        }
+        try:
+            await app(scope, receive, send)
+        finally:
+            # Pooled connections belong to the event loop of this call
+            await engine.dispose()
+
+    asyncio.run(run())
+    start, *bodies = messages
+    headers = {name.decode(): value.decode() for name, value in start["headers"]}
+    body = b"".join(message.get("body", b"") for message in bodies)
+    return start["status"], headers, body
+
+
+def run_lifespan():
+    """Start and shut down the ASGI app, return the messages it sent"""
+    incoming = iter([{"type": "lifespan.startup"}, {"type": "lifespan.shutdown"}])
+    messages = []
+
+    async def receive():
+        return next(incoming)
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(app({"type": "lifespan", "asgi": {"version": "3.0"}}, receive, send))
+    return messages
+
+
+class TestAsyncReadApp:
+    @pytest.mark.parametrize(
+        "path",
+        [
+            "/categories",
+            "/categories/1",
+            "/categories/1/items",
+            "/categories/1/items/1",
+        ],
+    )
+    def test_read_paths(self, client, path):
+        status, headers, body = call(path)
+
+        expected = client.get(path)
+        assert status == 200
+        assert json.loads(body) == expected.json
+        assert headers["ETag"] == expected.headers["ETag"]
+
+    def test_conditional_get(self):
+        _, headers, _ = call("/categories/1/items/1")
+
+        status, _, body = call(
+            "/categories/1/items/1", headers=[("If-None-Match", headers["ETag"])]
+        )
+        assert status == 304
+        assert body == b""
+
+    def test_errors(self):
+        status, _, body = call("/categories/91/items")
+        assert status == 404
+        assert json.loads(body)["error_message"] == "Category not found"
+
+        status, _, _ = call("/categories/1/items", query_string=b"sort=description")
+        assert status == 400
+
+    def test_runs_before_request_hooks(self, monkeypatch):
+        paths = []
+
+        def hook():
+            paths.append(request.path)
+            if request.path == "/categories/2":
+                return {"error_message": "Unavailable"}, 503
+
+        hooks = app.flask_app.before_request_funcs.get(None, [])
+        monkeypatch.setitem(app.flask_app.before_request_funcs, None, hooks + [hook])
+
+        assert call("/categories/1")[0] == 200
+        status, _, body = call("/categories/2")
+        assert status == 503
+        assert json.loads(body) == {"error_message": "Unavailable"}
+        assert paths == ["/categories/1", "/categories/2"]
+
+    def test_other_paths_are_served_by_wsgi_app(self):
+        status, _, body = call("/no/such/path")
+
+        assert status == 404
+        assert json.loads(body)["error_message"] == "Not found."
+
+    def test_lifespan_runs_startup_functions(self, monkeypatch):
+        started = []
+        monkeypatch.setattr(app, "on_startup", [started.append])
+
+        assert run_lifespan() == [
+            {"type": "lifespan.startup.complete"},
+            {"type": "lifespan.shutdown.complete"},
+        ]
+        assert started == [app.flask_app]
+
+    def test_failed_startup(self, monkeypatch):
+        def fail(_):
+            raise RuntimeError("no such table")
+
+        monkeypatch.setattr(app, "on_startup", [fail])
+
+        assert run_lifespan() == [
+            {"type": "lifespan.startup.failed", "message": "no such table"}
+        ]